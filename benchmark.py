@@ -0,0 +1,421 @@
+# =============================================================================
+# SARMAAN II COVERAGE EVALUATION - BENCHMARKS
+# =============================================================================
+# Times the dashboard's hot paths on synthetic Kobo-shaped surveys of a given
+# number of households and compares them with a saved baseline:
+#
+#   python benchmark.py --sizes 10000 100000 --save-baseline
+#   python benchmark.py --sizes 10000 100000          # exits 1 on a regression
+#   python benchmark.py --sizes 10000 --xlsx --unused-columns 150
+#   python benchmark.py --sizes 10000 --xlsx --api --memory
+#
+# Households are spread over the communities in COMMUNITY_MAPPING_DATA and use
+# the real column names, so every QC rule has rows to flag.
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+# Streamlit logs "missing ScriptRunContext" warnings when used outside `streamlit run`
+os.environ.setdefault('STREAMLIT_LOGGER_LEVEL', 'error')
+import coverage
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+
+# Stages faster than this are too noisy to compare with the baseline
+MIN_COMPARED_SECONDS = 0.05
+
+# XLSX sheets hold at most this many data rows
+XLSX_MAX_ROWS = 1_048_575
+
+ENUMERATORS = 60
+
+# Host the Kobo API payloads name in their URLs; the stand-in serves them itself
+KOBO_ORIGIN = 'https://kf.kobotoolbox.org'
+BENCHMARK_ASSET_PATH = '/api/v2/assets/aBenchmarkSurvey/'
+
+# Repeat group columns the Kobo export adds to link rows to their submission
+REPEAT_LINK_COLUMNS = ['_index', '_parent_table_name', '_parent_index', '_submission__uuid']
+
+# Round-specific headers as the December 2025 export names them
+Q86_HEADER = (
+    'Q86. Did someone visit your home between 6th December 2025 and 11th December 2025 to '
+    'offer your child or children any drug from a bottle?'
+)
+Q102_HEADER = 'Q102. About how many minutes did the CDD spend in your household?'
+Q88_HEADER = 'Q88. Child name and age ${child_idd} as at when MDA was done (6th to 11th December 2025)'
+Q90_HEADER = 'Q90. Did someone offer child ${child_idd} azithromycin between 6th and 11th of December 2025?'
+Q94_HEADER = 'Q94. Did child ${child_idd} swallow the AZM offered?'
+Q95_HEADER = 'Q95. Did child ${child_idd} swallow the AZM in the presence of the person who offered it?'
+
+
+def make_survey(households, seed=0):
+    """
+    Sheets dictionary shaped like the Kobo XLSX export for the given number of
+    households: main plus the child_info, child_infoo and net_repeat repeat
+    groups linked through _submission__uuid.
+    """
+    rng = np.random.default_rng(seed)
+    n = households
+    communities = coverage.COMMUNITY_DF
+    pick = rng.integers(0, len(communities), n)
+    start = pd.Timestamp('2025-12-06') + pd.to_timedelta(rng.integers(0, 6 * 86400, n), unit='s')
+    uuids = pd.Series(rng.integers(0, 2 ** 63, n, dtype=np.uint64)).map('{:032x}'.format).to_numpy()
+    
+    main = pd.DataFrame({
+        'start': start,
+        'end': start + pd.to_timedelta(rng.integers(600, 3600, n), unit='s'),
+        'Q2. Local Government Area': communities['Q2. Local Government Area'].to_numpy()[pick],
+        'Q3.Ward': communities['Q3.Ward'].to_numpy()[pick],
+        'Q4. Community Name': communities['community_name'].to_numpy()[pick],
+        'Q5. Type of Settlement': rng.choice(['Urban', 'Rural'], n, p=[0.3, 0.7]),
+        'Q8. Date': start.normalize(),
+        'username': rng.choice([f'enum{i:03d}' for i in range(ENUMERATORS)], n),
+        'Type in your Name': rng.choice([f'Enumerator {i}' for i in range(ENUMERATORS)], n),
+        'Q13. Age of Head of the Household': rng.integers(18, 90, n),
+        'Q20. Highest education level completed': rng.choice(
+            ['No Formal Education', 'Primary', 'Secondary', 'Tertiary'], n),
+        'Occupation': rng.choice(['Farmer', 'Trader', 'Professional', 'Civil servant'], n),
+        'Q22. How long have you been living continuously in ${community_confirm}': rng.integers(1, 95, n),
+        'total_children': rng.integers(-1, 8, n),
+        'eligible_children': rng.integers(0, 4, n),
+        Q86_HEADER: rng.choice(['Yes', 'No'], n, p=[0.8, 0.2]),
+        Q102_HEADER: rng.choice([0, 5, 10, 15, 30, 120, np.nan], n),
+        'unique_code': rng.integers(0, int(n * 0.99) + 1, n).astype(str),
+        '_id': np.arange(n) + 1,
+        '_uuid': uuids,
+        '_submission_time': start + pd.to_timedelta(rng.integers(3600, 86400, n), unit='s'),
+        '_validation_status': rng.choice(['Approved', 'Not Validated', 'On Hold', 'Not Approved', 'Rejected'],
+                                         n, p=[0.5, 0.3, 0.1, 0.05, 0.05]),
+        '_index': np.arange(n) + 1,
+    })
+    amenities = rng.random((n, len(coverage.AMENITY_COLUMNS))) < 0.3
+    # Some enumerators record every urban household without amenities
+    amenities[main['username'].isin(['enum000', 'enum001']).to_numpy()] = False
+    for position, col in enumerate(coverage.AMENITY_COLUMNS):
+        main[col] = np.where(amenities[:, position], 'Yes', 'No')
+    
+    def repeat_group(per_household):
+        parent = np.repeat(np.arange(n), rng.integers(0, per_household * 2 + 1, n))
+        return parent, pd.DataFrame({
+            '_index': np.arange(len(parent)) + 1,
+            '_parent_table_name': 'Coverage Evaluation Survey',
+            '_parent_index': parent + 1,
+            '_submission__uuid': uuids[parent],
+        })
+    
+    parent, child_info = repeat_group(2)
+    child_info.insert(0, 'child_id', rng.integers(1, 6, len(parent)))
+    child_info.insert(1, 'Age of child ${child_id} as at when MDA was done (6th to 11th December 2025)',
+                      rng.integers(1, 180, len(parent)))
+    
+    parent, child_infoo = repeat_group(1)
+    k = len(parent)
+    child_infoo.insert(0, 'child_idd', rng.integers(1, 4, k))
+    child_infoo.insert(1, Q88_HEADER, rng.integers(1, 70, k))
+    child_infoo.insert(2, Q90_HEADER, rng.choice(['Yes', 'No'], k, p=[0.9, 0.1]))
+    child_infoo.insert(3, Q94_HEADER, rng.choice(['Yes', 'No'], k, p=[0.85, 0.15]))
+    child_infoo.insert(4, Q95_HEADER, rng.choice(['Yes', 'No'], k, p=[0.8, 0.2]))
+    child_infoo.insert(5, 'unique_code2', rng.integers(0, 10 ** 7, k).astype(str))
+    
+    parent, net_repeat = repeat_group(1)
+    net_repeat.insert(0, 'net_id', rng.integers(1, 4, len(parent)))
+    net_repeat.insert(1, 'Q81. Net ${net_id} :How many months ago did your household get the mosquito net?',
+                      rng.integers(0, 36, len(parent)))
+    
+    return {'main': main, 'child_info': child_info, 'child_infoo': child_infoo, 'net_repeat': net_repeat}
+
+
+def add_unused_columns(main, count, seed=0):
+    """Main sheet plus count questions the dashboard never reads, as a real export carries"""
+    rng = np.random.default_rng(seed)
+    unused = {f'Q{200 + i}. Unused question {i}': rng.choice(['Yes', 'No', "Don't know"], len(main))
+              for i in range(count)}
+    return pd.concat([main, pd.DataFrame(unused, index=main.index)], axis=1)
+
+
+def sheets_mb(sheets_dict):
+    """In-memory size of the sheets in MB (lazy sheets that were not loaded count as nothing)"""
+    frames = [sheets_dict[name] for name in coverage.SHEET_NAMES if not coverage.is_lazy_sheet(sheets_dict[name])]
+    return sum(frame.memory_usage(deep=True).sum() for frame in frames) / 2 ** 20
+
+
+def write_workbook(sheets_dict):
+    """The survey as XLSX bytes, main as the first sheet like the Kobo export"""
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        for name in coverage.SHEET_NAMES:
+            sheets_dict[name].to_excel(writer, sheet_name=name, index=False)
+    return buffer.getvalue()
+
+
+def _as_strings(frame, columns):
+    """Each column as a list of strings (None when missing), the way the Kobo API sends answers"""
+    return [[None if missing else text for text, missing in zip(frame[col].astype(str), frame[col].isna())]
+            for col in columns]
+
+
+def kobo_api_payloads(sheets_dict, asset_path=BENCHMARK_ASSET_PATH, page_size=coverage.KOBO_API_PAGE_SIZE):
+    """
+    The survey as the Kobo data API would serve it: request path (with query) ->
+    JSON body, for the form definition and every data page. Questions get xml
+    names q<n> with their header as label; repeat groups are nested in their
+    submission.
+    """
+    survey = []
+    
+    def questions(frame, columns):
+        names = []
+        for col in columns:
+            name = f"q{len(survey)}"
+            survey.append({'name': name, 'type': 'integer' if pd.api.types.is_numeric_dtype(frame[col]) else 'text',
+                           'label': [col]})
+            names.append(name)
+        return names
+    
+    main = sheets_dict['main']
+    meta = [col for col in ['_id', '_uuid', '_submission_time'] if col in main.columns]
+    main_columns = [col for col in main.columns if not col.startswith('_')]
+    keys = meta + questions(main, main_columns)
+    records = [{key: value for key, value in zip(keys, row) if value is not None}
+               for row in zip(*_as_strings(main, meta + main_columns))]
+    for record, status in zip(records, main['_validation_status']):
+        record['_validation_status'] = {'label': status} if isinstance(status, str) else {}
+    
+    positions = pd.Series(range(len(main)), index=main['_uuid'])
+    for name in coverage.SHEET_NAMES[1:]:
+        sheet = sheets_dict[name]
+        columns = [col for col in sheet.columns if col not in REPEAT_LINK_COLUMNS]
+        survey.append({'name': name, 'type': 'begin_repeat'})
+        keys = [f"{name}/{question}" for question in questions(sheet, columns)]
+        survey.append({'type': 'end_repeat'})
+        for position, row in zip(positions[sheet['_submission__uuid']], zip(*_as_strings(sheet, columns))):
+            records[position].setdefault(name, []).append(
+                {key: value for key, value in zip(keys, row) if value is not None})
+    
+    payloads = {f"{asset_path}?format=json": json.dumps({'content': {'survey': survey, 'choices': []}}).encode()}
+    data_path = f"{asset_path}data/?format=json&limit={page_size}"
+    for start in range(0, max(len(records), 1), page_size):
+        path = data_path + (f"&start={start}" if start else '')
+        more = start + page_size < len(records)
+        payloads[path] = json.dumps({
+            'count': len(records),
+            'next': f"{KOBO_ORIGIN}{data_path}&start={start + page_size}" if more else None,
+            'results': records[start:start + page_size],
+        }).encode()
+    return payloads
+
+
+@contextmanager
+def serve_kobo_api(payloads, origin=KOBO_ORIGIN):
+    """
+    Local HTTP stand-in for the Kobo API serving payloads (request path with
+    query -> JSON body) on a free port, with origin in the bodies pointed at
+    itself. Yields (base_url, list of the paths requested so far).
+    """
+    requested = []
+    
+    class KoboHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requested.append(self.path)
+            body = payloads.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            body = body.replace(origin.encode(), base_url.encode())
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KoboHandler)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield base_url, requested
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def timed(timings, stage, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    timings[stage] = time.perf_counter() - start
+    return result
+
+
+def peak_mb(func, *args, **kwargs):
+    """Peak memory traced while func runs, in MB"""
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_size(households, seed=0, xlsx=False, workers=1, unused_columns=0, api=False, memory=False):
+    """
+    Seconds per stage for one synthetic survey; QC rules are timed one by one.
+    With xlsx the export is parsed eagerly with every column, and as the
+    dashboard reads it: projected columns and lazy secondary sheets. With api
+    the survey is loaded from a local stand-in for the Kobo data API. memory
+    adds a traced run of each ingestion path to report its peak memory.
+    """
+    timings = {}
+    sheets_dict = make_survey(households, seed=seed)
+    export = dict(sheets_dict, main=add_unused_columns(sheets_dict['main'], unused_columns, seed=seed))
+    
+    if xlsx:
+        if max(len(sheet) for sheet in sheets_dict.values()) > XLSX_MAX_ROWS:
+            print(f"  skipping XLSX parsing: more than {XLSX_MAX_ROWS:,} rows in a sheet")
+        else:
+            content = write_workbook(export)
+            all_columns, _ = timed(timings, 'read_kobo_workbook/all_columns', coverage.read_kobo_workbook,
+                                   BytesIO(content))
+            sheets_dict, load_timings = timed(timings, 'read_kobo_workbook', coverage.read_kobo_workbook,
+                                              BytesIO(content), coverage.column_projection(), coverage.LAZY_SHEETS)
+            timings.update({f"read_kobo_workbook/{name}": seconds for name, seconds in load_timings.items()})
+            print(f"  as the dashboard reads it: {sum(sheets_dict['dropped_columns'].values())} columns dropped, "
+                  f"{sheets_mb(sheets_dict):.1f} MB instead of {sheets_mb(all_columns):.1f} MB, "
+                  f"parsed in {timings['read_kobo_workbook']:.2f}s instead of "
+                  f"{timings['read_kobo_workbook/all_columns']:.2f}s")
+            del all_columns
+            if memory:
+                peak = peak_mb(coverage.read_kobo_workbook, BytesIO(content), coverage.column_projection(),
+                               coverage.LAZY_SHEETS)
+                print(f"  XLSX peak memory: {peak:.1f} MB on top of the {len(content) / 2 ** 20:.1f} MB download")
+    
+    if api:
+        with serve_kobo_api(kobo_api_payloads(export)) as (base_url, _):
+            asset_url = base_url + BENCHMARK_ASSET_PATH
+            api_sheets, load_timings = timed(timings, 'load_sheets_from_kobo_api', coverage.load_sheets_from_kobo_api,
+                                             asset_url, keep_column=coverage.column_projection())
+            timings.update({f"load_sheets_from_kobo_api/{name}": seconds for name, seconds in load_timings.items()})
+            print(f"  from the Kobo data API: {sheets_mb(api_sheets):.1f} MB, "
+                  f"loaded in {timings['load_sheets_from_kobo_api']:.2f}s")
+            del api_sheets
+            if memory:
+                peak = peak_mb(coverage.load_sheets_from_kobo_api, asset_url, keep_column=coverage.column_projection())
+                print(f"  API peak memory: {peak:.1f} MB, pages of {coverage.KOBO_API_PAGE_SIZE:,} submissions included")
+    
+    timed(timings, 'compute_data_version', coverage.compute_data_version, sheets_dict)
+    sheets_dict = timed(timings, 'preprocess_data', coverage.preprocess_data, sheets_dict)
+    df = sheets_dict['main']
+    child_df = sheets_dict['child_infoo']
+    
+    timed(timings, 'calculate_metrics', coverage.calculate_metrics, df)
+    timed(timings, 'build_filter_index', coverage.build_filter_index, df)
+    timed(timings, 'build_coverage_summary', coverage.build_coverage_summary, df, {})
+    timed(timings, 'household_fingerprints', coverage.household_fingerprints, df, child_df)
+    
+    rule_stats = []
+    if workers > 1:
+        # Start the worker processes outside the timing, as a running dashboard has them
+        coverage.perform_qc_checks(df.head(100), child_df=child_df, disabled_rules=[], workers=workers)
+    timed(timings, 'perform_qc_checks', coverage.perform_qc_checks, df, child_df=child_df,
+          disabled_rules=[], rule_stats=rule_stats, workers=workers)
+    for stats in coverage.summarize_rule_stats(rule_stats).to_dict('records'):
+        timings[f"qc/{stats['Rule']}"] = stats['Seconds']
+    
+    # What a view reading the secondary sheets would pay on first use
+    start = time.perf_counter()
+    for name in coverage.LAZY_SHEETS:
+        coverage.get_sheet(sheets_dict, name)
+    timings['load_lazy_sheets'] = time.perf_counter() - start
+    return timings
+
+
+def run_benchmarks(sizes, repeat=1, xlsx=False, workers=1, unused_columns=0, api=False, memory=False):
+    """Best-of-repeat seconds keyed "<households>/<stage>" """
+    results = {}
+    for households in sizes:
+        print(f"{households:,} households")
+        for run in range(repeat):
+            stage_timings = benchmark_size(households, seed=run, xlsx=xlsx, workers=workers,
+                                           unused_columns=unused_columns, api=api, memory=memory)
+            for stage, seconds in stage_timings.items():
+                key = f"{households}/{stage}"
+                results[key] = min(seconds, results.get(key, seconds))
+        for key, seconds in results.items():
+            if key.startswith(f"{households}/"):
+                print(f"  {key.split('/', 1)[1]:<60} {seconds:8.3f}s")
+    return results
+
+
+def find_regressions(results, baseline, tolerance):
+    """(key, baseline seconds, seconds) for stages slower than baseline * (1 + tolerance)"""
+    regressions = []
+    for key, seconds in results.items():
+        reference = baseline.get(key)
+        if reference is None or reference < MIN_COMPARED_SECONDS:
+            continue
+        if seconds > reference * (1 + tolerance):
+            regressions.append((key, reference, seconds))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard's hot paths on synthetic surveys.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Households per synthetic survey")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per size; the fastest run counts")
+    parser.add_argument('--xlsx', action='store_true', help="Also time parsing the survey as an XLSX export")
+    parser.add_argument('--api', action='store_true',
+                        help="Also time loading the survey from a local stand-in for the Kobo data API")
+    parser.add_argument('--memory', action='store_true',
+                        help="Report the peak memory of each ingestion path (one extra traced run each)")
+    parser.add_argument('--unused-columns', type=int, default=0,
+                        help="Extra main sheet questions the dashboard does not read (with --xlsx or --api)")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes to spread QC rules across")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help=f"Baseline JSON file (default: {DEFAULT_BASELINE})")
+    parser.add_argument('--save-baseline', action='store_true', help="Record these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed slowdown against the baseline as a fraction (default: 0.25)")
+    args = parser.parse_args(argv)
+    
+    results = run_benchmarks(args.sizes, repeat=args.repeat, xlsx=args.xlsx, workers=args.workers,
+                             unused_columns=args.unused_columns, api=args.api, memory=args.memory)
+    
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Saved {len(results)} timings to {args.baseline}")
+        return 0
+    
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline first")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = find_regressions(results, baseline, args.tolerance)
+    for key, reference, seconds in regressions:
+        print(f"REGRESSION {key}: {reference:.3f}s -> {seconds:.3f}s ({seconds / reference - 1:+.0%})")
+    if regressions:
+        return 1
+    print(f"No regressions beyond {args.tolerance:.0%} of {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
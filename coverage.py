@@ -4,17 +4,48 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 from io import BytesIO, StringIO
 import requests
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import weakref
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from xml.etree import ElementTree
+from pandas.io.parsers import TextParser
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.ipc
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; process peak memory is then not reported
+    resource = None
 
 # ---------------- PAGE CONFIGURATION ----------------
-st.set_page_config(
-    page_title="SARMAAN II Coverage Evaluation Dashboard",
-    layout="wide",
-    initial_sidebar_state="expanded",
-    page_icon="📊"
-)
+def configure_page():
+    """Page settings; must be the first Streamlit call of a dashboard run"""
+    st.set_page_config(
+        page_title="SARMAAN II Coverage Evaluation Dashboard",
+        layout="wide",
+        initial_sidebar_state="expanded",
+        page_icon="📊"
+    )
 
 # ---------------- ADMIN CREDENTIALS ----------------
 ADMIN_USERNAME = "Admin"
@@ -29,8 +60,56 @@ LGA_CREDENTIALS = {
     "rimi": "Rimi",
 }
 
+def read_secret(name, default):
+    """
+    Value of a Streamlit secret, or default when it is not set. Also works
+    outside `streamlit run` (batch jobs) and without a secrets.toml.
+    """
+    try:
+        return st.secrets.get(name, default)
+    except Exception:
+        return default
+
+
+def read_bool_secret(name, default):
+    """Boolean secret; "false", "0", "no" and "off" (any case) also mean False"""
+    value = read_secret(name, default)
+    if isinstance(value, str):
+        return value.strip().lower() not in ('0', 'false', 'no', 'off', '')
+    return bool(value)
+
+
 # Load KoboToolbox URL from Streamlit secrets (secure)
-KOBO_DATA_URL = st.secrets.get("KOBO_DATA_URL", "")
+KOBO_DATA_URL = read_secret("KOBO_DATA_URL", "")
+
+# Ingestion backend: "xlsx" (export download) or "api" (paginated KoboToolbox data API)
+KOBO_INGEST_BACKEND = read_secret("KOBO_INGEST_BACKEND", "xlsx")
+KOBO_API_URL = read_secret("KOBO_API_URL", "")
+KOBO_API_TOKEN = read_secret("KOBO_API_TOKEN", "")
+
+# Sync mode for the API backend: "full" re-downloads everything, "incremental"
+# only fetches new/changed submissions and merges them into KOBO_CACHE_DIR
+KOBO_SYNC_MODE = read_secret("KOBO_SYNC_MODE", "full")
+KOBO_CACHE_DIR = read_secret("KOBO_CACHE_DIR", ".kobo_cache")
+
+# Seconds between background refreshes of the served dataset
+KOBO_REFRESH_SECONDS = int(read_secret("KOBO_REFRESH_SECONDS", 600))
+
+# Refresh requests within this many seconds of the last fetch or request are coalesced
+KOBO_REFRESH_COOLDOWN_SECONDS = int(read_secret("KOBO_REFRESH_COOLDOWN_SECONDS", 60))
+
+# First retry delay after a failed refresh; it doubles per failure up to KOBO_REFRESH_SECONDS
+KOBO_RETRY_SECONDS = 30
+
+# Read only the columns the dashboard uses from the export/API (False keeps every column)
+KOBO_PRUNE_COLUMNS = read_bool_secret("KOBO_PRUNE_COLUMNS", True)
+
+# Names (issue types) of QC rules to switch off, e.g. ["No Eligible Children"]
+QC_DISABLED_RULES = list(read_secret("QC_DISABLED_RULES", []))
+
+# Worker processes QC rules are spread across (1 = run them in this process);
+# only worth it with spare CPU cores and a large dataset
+QC_WORKERS = int(read_secret("QC_WORKERS", 1))
 
 # ---------------- COMMUNITY MAPPING DATA ----------------
 COMMUNITY_MAPPING_DATA = """Q2. Local Government Area	Q3.Ward	Q4. Community Name	community_name	Planned HH
@@ -69,7 +148,7 @@ COMMUNITY_NAME_TO_CODE = dict(zip(COMMUNITY_DF['Q4. Community Name'], COMMUNITY_
 COMMUNITY_PLANNED_HH = dict(zip(COMMUNITY_DF['community_name'].astype(str), COMMUNITY_DF['Planned HH']))
 
 # ---------------- CUSTOM CSS STYLING ----------------
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     /* Import Google Fonts */
     @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&display=swap');
@@ -433,69 +512,897 @@ st.markdown("""
         }
     }
 </style>
-""", unsafe_allow_html=True)
+"""
 
-# ---------------- DATA LOADING ----------------
-@st.cache_data(show_spinner="📊 Loading data from KoboToolbox...", ttl=600)
-def load_data_from_kobo():
-    """Load all sheets from KoboToolbox API and return as dictionary"""
+
+def apply_custom_css():
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+# ---------------- STAGE TRACING ----------------
+# run_dashboard records wall time, rows and memory per stage into a trace dict.
+# Cached functions report their misses, so a stage that calls one also shows
+# whether the cache hit.
+TRACE_LOCAL = threading.local()
+
+# tracemalloc is process-wide: runs of all sessions that track memory share it,
+# and it is stopped when the last of them finishes (only if we started it)
+TRACEMALLOC_USERS = {'lock': threading.Lock(), 'count': 0, 'started': False}
+
+
+def start_trace(track_memory=False):
+    """
+    New trace for one dashboard run; always end it with finish_trace. track_memory
+    turns on tracemalloc for per-stage peaks; it slows allocations, so it is opt-in.
+    """
+    trace = {'started_at': time.time(), 'stages': [], 'track_memory': track_memory, 'finished': False}
+    if track_memory:
+        with TRACEMALLOC_USERS['lock']:
+            if TRACEMALLOC_USERS['count'] == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                TRACEMALLOC_USERS['started'] = True
+            TRACEMALLOC_USERS['count'] += 1
+    TRACE_LOCAL.stage = None
+    return trace
+
+
+def finish_trace(trace):
+    """Stop the run's clock and release tracemalloc; later calls do nothing"""
+    if trace['finished']:
+        return
+    trace['finished'] = True
+    trace['seconds'] = time.time() - trace['started_at']
+    if trace['track_memory']:
+        with TRACEMALLOC_USERS['lock']:
+            TRACEMALLOC_USERS['count'] -= 1
+            if TRACEMALLOC_USERS['count'] == 0 and TRACEMALLOC_USERS['started']:
+                tracemalloc.stop()
+                TRACEMALLOC_USERS['started'] = False
+
+
+def process_peak_mb():
+    """Peak resident memory of the process so far, where the platform reports it"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def begin_stage(trace, name, cache=None):
+    """
+    Start timing stage name; end it with end_stage. cache names the cached
+    function the stage calls. Set the returned stage's 'Rows' to the rows it processed.
+    """
+    stage = {'Stage': name, 'Rows': None, 'Cache': f"{cache}: hit" if cache else None, '_parent': TRACE_LOCAL.stage}
+    TRACE_LOCAL.stage = stage
+    if trace['track_memory'] and tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        stage['_memory_base'] = tracemalloc.get_traced_memory()[0]
+    stage['_start'] = time.perf_counter()
+    return stage
+
+
+def end_stage(trace, stage):
+    stage['Seconds'] = time.perf_counter() - stage.pop('_start')
+    memory_base = stage.pop('_memory_base', None)
+    if memory_base is not None and tracemalloc.is_tracing():
+        stage['Peak MB'] = max(tracemalloc.get_traced_memory()[1] - memory_base, 0) / 2 ** 20
+    stage['Process peak MB'] = process_peak_mb()
+    TRACE_LOCAL.stage = stage.pop('_parent')
+    trace['stages'].append(stage)
+
+
+@contextmanager
+def trace_stage(trace, name, cache=None):
+    """Time the with-block as one stage (see begin_stage)"""
+    stage = begin_stage(trace, name, cache=cache)
     try:
-        # Check if URL is configured
-        if "YOUR_ASSET_ID" in KOBO_DATA_URL or "myurl_here" in KOBO_DATA_URL or "my url here" in KOBO_DATA_URL:
-            st.warning("⚠️ KoboToolbox URL is not configured. Please update the KOBO_DATA_URL variable in the code.")
-            return {
-                'main': pd.DataFrame(),
-                'child_info': pd.DataFrame(),
-                'child_infoo': pd.DataFrame(),
-                'net_repeat': pd.DataFrame()
-            }
-        
-        response = requests.get(KOBO_DATA_URL, timeout=60)
-        response.raise_for_status()
-        excel_file = BytesIO(response.content)
-        
-        # Read all sheets
+        yield stage
+    finally:
+        end_stage(trace, stage)
+
+
+def note_cache_miss(cache):
+    """Called first thing in cached function bodies, which only run on a miss"""
+    stage = getattr(TRACE_LOCAL, 'stage', None)
+    if stage is not None and stage['Cache'] == f"{cache}: hit":
+        stage['Cache'] = f"{cache}: miss"
+
+
+def trace_frame(trace):
+    """Stages of a trace as a table, in the order they finished"""
+    columns = ['Stage', 'Seconds', 'Rows', 'Peak MB', 'Process peak MB', 'Cache']
+    return pd.DataFrame(trace['stages'], columns=columns).dropna(axis=1, how='all')
+
+
+def trace_json(trace, **extra):
+    """The trace plus extra tables/values (e.g. load timings) as a JSON document"""
+    document = {
+        'started_at': pd.Timestamp(trace['started_at'], unit='s').isoformat(),
+        'seconds': trace.get('seconds'),
+        'track_memory': trace['track_memory'],
+        'stages': trace['stages'],
+    }
+    for key, value in extra.items():
+        document[key] = value.to_dict('records') if isinstance(value, pd.DataFrame) else value
+    return json.dumps(document, indent=2, default=lambda value: value.item() if hasattr(value, 'item') else str(value))
+
+
+# ---------------- SCHEMA RESOLVER ----------------
+# Canonical field -> raw Kobo headers it may appear under, most preferred first.
+# Compiled patterns match headers that change with each survey round (the MDA
+# dates in the question text); the first matching column in sheet order wins.
+FIELD_SCHEMA = {
+    # Main sheet: location, identity and review status
+    'lga': ['lgas', 'lga', 'Q2. Local Government Area', 'LGA', 'Local Government Area', 'Lgas'],
+    'ward': ['wards', 'ward', 'Q3.Ward', 'Q3. Ward', 'Ward', 'Wards'],
+    'community': ['Community Name', 'Q4. Community Name', 'community', 'Community'],
+    'community_code': ['Q4. Community Name', 'community', 'community_name'],
+    # The Planned vs Reached table groups by (see build_coverage_summary); its own order
+    'coverage_lga': ['Q2. Local Government Area', 'lga', 'LGA'],
+    'coverage_ward': ['Q3.Ward', 'Q3. Ward', 'ward', 'Ward'],
+    'validation_status': ['_validation_status', 'validation_status', 'Validation Status'],
+    'enumerator_name': ['Type in your Name', 'username', 'Enumerator', 'enumerator_name', 'enumerator'],
+    'enumerator_id': ['username', 'Enumerator id', 'Type in your Name', 'enumerator', 'Enumerator', 'enumerator_name'],
+    # The enumerator QC groups by (pattern rule, incremental QC); its own order
+    'qc_enumerator': ['username', 'Type in your Name', 'Enumerator', 'enumerator_name'],
+    'unique_code': ['unique_code', 'unique_code_1', 'household_code'],
+    'uuid': ['_uuid', 'uuid'],
+    'date': ['Q8. Date', '_submission_time', 'start', 'Date', 'date', 'submission_time'],
+    # Main sheet: household questions
+    'settlement': ['Q5. Type of Settlement', 'Q5', 'settlement_type', 'settlement'],
+    'hh_head_age': ['Q13. Age of Head of the Household', 'Q13', 'hh_head_age', 'age_head'],
+    'education': ['Q20. Highest education level completed', 'Q20', 'education', 'education_level'],
+    'occupation': ['Occupation', 'occupation', 'Q21. Occupation'],
+    'years_living': ['Q22. How long have you been living continuously in ${community_confirm}',
+                     'Q22', 'years_living', 'residence_duration'],
+    'q86': [re.compile(r'Q86\. Did someone visit your home between .+ to offer your child or children any drug from a bottle\?'),
+            'Q86', 'home_visit', 'visited_home'],
+    'q102': ['Q102. About how many minutes did the CDD spend in your household?', 'Q102', 'cdd_time_minutes', 'cdd_time'],
+    'respondent_age': ['Q17. How old is ${name_questionnaire}?', 'Q17', 'age', 'respondent_age',
+                       re.compile(r'Age of child \$\{child_id\} as at when MDA was done \(.+\)'),
+                       'child_age', 'Age', 'age_years'],
+    # child_info, child_infoo and net_repeat sheets
+    'child_info_age': [re.compile(r'Age of child \$\{child_id\} as at when MDA was done \(.+\)')],
+    'child_age': [re.compile(r'Q88\. Child name and age \$\{child_idd\} as at when MDA was done \(.+\)'),
+                  'age_months', 'child_age'],
+    'q90': [re.compile(r'Q90\. Did someone offer child \$\{child_idd\} azithromycin between .+\?'),
+            'Q90', 'offered_azm', 'offer_azithromycin'],
+    'q94': ['Q94. Did child ${child_idd} swallow the AZM offered?', 'Q94', 'child_swallow_azm'],
+    'q95': ['Q95. Did child ${child_idd} swallow the AZM in the presence of the person who offered it?',
+            'Q95', 'swallow_in_presence'],
+    'net_months_ago': ['Q81. Net ${net_id} :How many months ago did your household get the mosquito net?'],
+}
+
+
+@lru_cache(maxsize=64)
+def resolve_schema(columns):
+    """
+    Canonical field -> raw column (None when absent) for a tuple of headers.
+    Cached by header tuple, so every frame of a data version (filtered slices,
+    LGA partitions) reuses one resolution. The result is shared: do not modify it.
+    """
+    present = set(columns)
+    schema = {}
+    for field, candidates in FIELD_SCHEMA.items():
+        schema[field] = None
+        for candidate in candidates:
+            if isinstance(candidate, str):
+                match = candidate if candidate in present else None
+            else:
+                match = next((col for col in columns if isinstance(col, str) and candidate.fullmatch(col)), None)
+            if match is not None:
+                schema[field] = match
+                break
+    return schema
+
+
+def schema_of(df):
+    """Canonical field -> raw column for df (see resolve_schema)"""
+    return resolve_schema(tuple(df.columns))
+
+
+def field_column(df, field):
+    """Raw column of df holding a canonical field, or None"""
+    return schema_of(df)[field]
+
+
+def schema_columns(df, fields):
+    """Raw columns of df holding the given fields (missing ones skipped, no repeats)"""
+    schema = schema_of(df)
+    return list(dict.fromkeys(schema[field] for field in fields if schema[field] is not None))
+
+
+# ---------------- COLUMN PROJECTION ----------------
+# A Kobo export carries hundreds of question columns the dashboard never reads.
+# Ingestion keeps only the columns named here, in FIELD_SCHEMA or by the enabled
+# QC rules, and drops the rest before they become pandas objects.
+PROJECTION_KEEP_COLUMNS = [
+    # Submission identity, sync watermark and the derived eligibility total
+    '_id', '_uuid', '_index', '_submission_time', '_validation_status', 'start', 'end', 'total_eligible',
+    # Repeat-group linkage and child identifiers
+    '_parent_index', '_parent_table_name', '_submission__id', '_submission__uuid',
+    'child_id', 'child_idd', 'unique_code2', 'net_id',
+]
+
+
+def column_projection(disabled_rules=None):
+    """
+    Predicate on raw headers: True for columns the dashboard reads (any
+    FIELD_SCHEMA candidate, PROJECTION_KEEP_COLUMNS and the columns enabled QC
+    rules pick by name). disabled_rules defaults to QC_DISABLED_RULES.
+    """
+    disabled_rules = QC_DISABLED_RULES if disabled_rules is None else disabled_rules
+    names = set(PROJECTION_KEEP_COLUMNS)
+    patterns = []
+    for candidates in FIELD_SCHEMA.values():
+        for candidate in candidates:
+            if isinstance(candidate, str):
+                names.add(candidate)
+            else:
+                patterns.append(candidate)
+    
+    tests = []
+    for rule in QC_RULES:
+        if rule['name'] in disabled_rules:
+            continue
+        for columns in rule.get('column_lists', {}).values():
+            names.update(columns)
+        if 'each_column' in rule:
+            tests.append(rule['each_column'])
+    
+    def keep_column(header):
+        if not isinstance(header, str):
+            return False
+        return (header in names or any(pattern.fullmatch(header) for pattern in patterns)
+                or any(test(header) for test in tests))
+    return keep_column
+
+
+def _excel_cell(value):
+    """A cell value as pandas' openpyxl reader hands it to TextParser"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def read_projected_sheet(worksheet, keep_column):
+    """
+    Stream a worksheet and convert only the cells of columns whose header passes
+    keep_column. They go through the TextParser pd.read_excel uses, so kept
+    columns come out as a full parse would give them.
+    Returns (frame, number of columns dropped).
+    """
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return pd.DataFrame(), 0
+    positions = [i for i, name in enumerate(header) if keep_column(name)]
+    width = len(header)
+    
+    data = [[header[i] for i in positions]]
+    for row in rows:
+        if len(row) < width:
+            row = row + (None,) * (width - len(row))
+        data.append([_excel_cell(row[i]) for i in positions])
+    # Trailing blank rows are not data (read_excel drops them too)
+    while len(data) > 1 and all(value == '' for value in data[-1]):
+        data.pop()
+    if not positions:
+        return pd.DataFrame(index=pd.RangeIndex(len(data) - 1)), width
+    return TextParser(data, header=0).read(), width - len(positions)
+
+
+# ---------------- LAZY SECONDARY SHEETS ----------------
+# No view or QC rule reads these repeat groups, so the XLSX path hands them out
+# as handles: each is parsed and converted the first time get_sheet asks for it,
+# once per snapshot, and the dashboard pays nothing for it otherwise. A
+# downloaded export is spooled to a file for them rather than kept in memory.
+LAZY_SHEETS = ['child_info', 'net_repeat']
+
+# Workbook files that lazy handles may still read, with the number of loaders
+# using each; write_sheet_store does not prune a stored version while it is here
+LIVE_WORKBOOKS = {'lock': threading.Lock(), 'paths': {}}
+
+
+def lazy_sheet(load, fingerprint, source=None):
+    """
+    Handle for a sheet that load() materializes on first use. fingerprint stands
+    in for its contents in the data version; source is the workbook file it reads.
+    Once loaded, the handle drops load and source.
+    """
+    return {'load': load, 'fingerprint': fingerprint, 'source': source, 'frame': None, 'lock': threading.Lock()}
+
+
+def is_lazy_sheet(sheet):
+    return isinstance(sheet, dict) and 'load' in sheet
+
+
+def get_sheet(sheets_dict, name):
+    """
+    A sheet as a DataFrame (empty when absent), loading a lazy handle on first use.
+    A failed load raises and leaves the handle unloaded.
+    """
+    sheet = sheets_dict.get(name)
+    if sheet is None:
+        return pd.DataFrame()
+    if not is_lazy_sheet(sheet):
+        return sheet
+    with sheet['lock']:
+        if sheet['frame'] is None:
+            sheet['frame'] = sheet['load']()
+            # Let go of the workbook (see workbook_lazy_sheets)
+            sheet['load'] = sheet['source'] = None
+        return sheet['frame']
+
+
+def xlsx_sheet_digest(path, sheet_name):
+    """
+    SHA-1 of a worksheet's raw XML in an XLSX file, found through the workbook
+    relationships without parsing a single cell. None when there is no such sheet.
+    """
+    with zipfile.ZipFile(path) as archive:
+        targets = {rel.get('Id'): rel.get('Target')
+                   for rel in ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))}
+        for sheet in ElementTree.fromstring(archive.read('xl/workbook.xml')).iter():
+            if sheet.tag.endswith('}sheet') and sheet.get('name') == sheet_name:
+                rel_id = next(value for key, value in sheet.attrib.items() if key.endswith('}id'))
+                target = targets[rel_id]
+                path = target.lstrip('/') if target.startswith('/') else 'xl/' + target
+                return hashlib.sha1(archive.read(path)).hexdigest()
+    return None
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _release_workbook(path, remove):
+    """Finalizer of a lazy sheet loader: forget (and with remove, delete) its workbook after the last one"""
+    with LIVE_WORKBOOKS['lock']:
+        LIVE_WORKBOOKS['paths'][path] -= 1
+        if LIVE_WORKBOOKS['paths'][path]:
+            return
+        del LIVE_WORKBOOKS['paths'][path]
+    if remove:
+        _remove_file(path)
+
+
+def workbook_in_use(path):
+    """True while a lazy sheet handle may still read the workbook at path"""
+    with LIVE_WORKBOOKS['lock']:
+        return os.path.abspath(path) in LIVE_WORKBOOKS['paths']
+
+
+def spool_workbook(source, spool_dir=None):
+    """
+    Path of the XLSX source for lazy handles: a path is used as is, an in-memory
+    export is written to a temporary file in spool_dir. Returns (path, is_spooled).
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return source, False
+    fd, path = tempfile.mkstemp(prefix='kobo_export_', suffix='.xlsx', dir=spool_dir)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(source.getbuffer() if hasattr(source, 'getbuffer') else source.read())
+    return path, True
+
+
+def workbook_lazy_sheets(path, names, keep_column=None, fingerprints=None, remove_when_unused=False):
+    """
+    Lazy handles for the named sheets of the XLSX file at path. Loading parses a
+    sheet (only the keep_column columns when given) and converts it like
+    preprocess_data. All handles share one loader, and the file counts as in use
+    (see workbook_in_use) until that loader is gone, i.e. every sheet was loaded
+    or the handles were dropped with their snapshot; with remove_when_unused it
+    is then deleted.
+    """
+    def load_sheet(name):
+        with pd.ExcelFile(path, engine='openpyxl') as workbook:
+            if keep_column is None:
+                frame = workbook.parse(sheet_name=name)
+            else:
+                frame, _ = read_projected_sheet(workbook.book[name], keep_column)
+        return SECONDARY_SHEET_PREPARERS[name](frame) if not frame.empty else frame
+    
+    fingerprints = fingerprints or {}
+    handles = {
+        name: lazy_sheet(partial(load_sheet, name), fingerprints.get(name) or xlsx_sheet_digest(path, name), path)
+        for name in names
+    }
+    key = os.path.abspath(path)
+    with LIVE_WORKBOOKS['lock']:
+        LIVE_WORKBOOKS['paths'][key] = LIVE_WORKBOOKS['paths'].get(key, 0) + 1
+    weakref.finalize(load_sheet, _release_workbook, key, remove_when_unused)
+    return handles
+
+
+# ---------------- DATA LOADING ----------------
+SHEET_NAMES = ['main', 'child_info', 'child_infoo', 'net_repeat']
+
+
+def compute_data_version(sheets_dict):
+    """Fingerprint the loaded sheets so derived results can be cached per data version"""
+    digest = hashlib.sha1()
+    for name in SHEET_NAMES:
+        sheet = sheets_dict.get(name)
+        if is_lazy_sheet(sheet):
+            # Stands in for the contents without loading the sheet
+            digest.update(f"{name}:lazy:{sheet['fingerprint']}".encode())
+            continue
+        if sheet is None or sheet.empty:
+            digest.update(f"{name}:empty".encode())
+            continue
+        digest.update(f"{name}:{sheet.shape}:{list(sheet.columns)}".encode())
+        digest.update(pd.util.hash_pandas_object(sheet, index=False).values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def read_kobo_workbook(source, keep_column=None, lazy_sheets=(), spool_dir=None):
+    """
+    Open a Kobo XLSX export once and parse every sheet we need from that handle.
+    pandas opens the workbook with openpyxl in read-only (streaming) mode.
+    With keep_column (see column_projection) only the matching columns are
+    parsed and sheets_dict['dropped_columns'] counts the others per sheet.
+    Sheets named in lazy_sheets are returned as handles (see get_sheet); an
+    in-memory source is then spooled to a temporary file in spool_dir for them.
+    Returns (sheets_dict, load_timings) with seconds per step and per sheet.
+    """
+    load_timings = {}
+    dropped_columns = {}
+    
+    def parse(workbook, name, sheet_name):
+        if keep_column is None:
+            return workbook.parse(sheet_name=sheet_name)
+        worksheet = workbook.book.worksheets[0] if sheet_name == 0 else workbook.book[sheet_name]
+        frame, dropped_columns[name] = read_projected_sheet(worksheet, keep_column)
+        return frame
+    
+    start = time.perf_counter()
+    with pd.ExcelFile(source, engine='openpyxl') as workbook:
+        load_timings['open_workbook'] = time.perf_counter() - start
+        
         sheets_dict = {}
-        try:
-            # Read main sheet (Coverage Evaluation Survey)
-            sheets_dict['main'] = pd.read_excel(excel_file, sheet_name=0)
-            
-            # Try to read other sheets
-            try:
-                sheets_dict['child_info'] = pd.read_excel(excel_file, sheet_name='child_info')
-            except Exception:
-                sheets_dict['child_info'] = pd.DataFrame()
-            
-            try:
-                sheets_dict['child_infoo'] = pd.read_excel(excel_file, sheet_name='child_infoo')
-            except Exception:
-                sheets_dict['child_infoo'] = pd.DataFrame()
-            
-            try:
-                sheets_dict['net_repeat'] = pd.read_excel(excel_file, sheet_name='net_repeat')
-            except Exception:
-                sheets_dict['net_repeat'] = pd.DataFrame()
-                
-        except Exception as e:
-            st.warning(f"⚠️ Could not read all sheets: {e}. Loading main sheet only.")
-            sheets_dict = {
-                'main': pd.read_excel(excel_file),
-                'child_info': pd.DataFrame(),
-                'child_infoo': pd.DataFrame(),
-                'net_repeat': pd.DataFrame()
-            }
+        lazy_names = [name for name in SHEET_NAMES if name in lazy_sheets and name in workbook.sheet_names]
+        if lazy_names:
+            start = time.perf_counter()
+            if hasattr(source, 'seek'):
+                source.seek(0)
+            path, is_spooled = spool_workbook(source, spool_dir)
+            sheets_dict.update(workbook_lazy_sheets(path, lazy_names, keep_column, remove_when_unused=is_spooled))
+            load_timings['spool_workbook'] = time.perf_counter() - start
+        
+        for name in SHEET_NAMES:
+            start = time.perf_counter()
+            if name == 'main':
+                # Main sheet (Coverage Evaluation Survey) is always the first sheet
+                sheets_dict['main'] = parse(workbook, 'main', 0)
+            elif name in lazy_names:
+                continue
+            elif name in workbook.sheet_names:
+                try:
+                    sheets_dict[name] = parse(workbook, name, name)
+                except Exception:
+                    sheets_dict[name] = pd.DataFrame()
+            else:
+                sheets_dict[name] = pd.DataFrame()
+            load_timings[name] = time.perf_counter() - start
+    
+    if keep_column is not None:
+        sheets_dict['dropped_columns'] = dropped_columns
+    return sheets_dict, load_timings
+
+
+# ---------------- KOBO DATA API INGESTION ----------------
+# A decoded page dominates peak memory while loading (see benchmark.py --api --memory)
+KOBO_API_PAGE_SIZE = 1000
+
+# List-valued submission metadata that the XLSX export does not carry
+KOBO_DROPPED_LISTS = {'_attachments', '_geolocation', '_notes'}
+
+NUMERIC_FIELD_TYPES = {'integer', 'decimal', 'range'}
+
+
+def _first_label(label, default):
+    """Kobo labels are lists (one entry per translation); use the first one"""
+    if isinstance(label, list):
+        label = next((text for text in label if text), None)
+    return label or default
+
+
+def _validation_label(value):
+    """Turn the API's _validation_status object into the label shown in the XLSX export"""
+    if isinstance(value, dict):
+        return value.get('label') or None
+    return value
+
+
+def kobo_api_session(token=""):
+    """requests session with the KoboToolbox token header, if one is configured"""
+    session = requests.Session()
+    if token:
+        session.headers['Authorization'] = f"Token {token}"
+    return session
+
+
+def fetch_kobo_form(session, asset_url):
+    """
+    Read the form definition so API field names can be mapped to the same
+    column headers and choice labels as the XLSX export.
+    Returns (fields, repeat_groups): fields maps xml name -> label/type/choices.
+    """
+    response = session.get(asset_url, params={'format': 'json'}, timeout=60)
+    response.raise_for_status()
+    content = response.json().get('content', {})
+    
+    choices = {}
+    for choice in content.get('choices', []):
+        choices.setdefault(choice.get('list_name'), {})[choice.get('name')] = \
+            _first_label(choice.get('label'), choice.get('name'))
+    
+    fields = {}
+    repeat_groups = set()
+    for item in content.get('survey', []):
+        name = item.get('name') or item.get('$autoname')
+        if not name:
+            continue
+        type_parts = str(item.get('type', '')).split()
+        item_type = type_parts[0] if type_parts else ''
+        if item_type == 'begin_repeat':
+            repeat_groups.add(name)
+            continue
+        list_name = item.get('select_from_list_name') or (type_parts[1] if len(type_parts) > 1 else None)
+        fields[name] = {
+            'label': _first_label(item.get('label'), name),
+            'type': item_type,
+            'choices': choices.get(list_name, {}),
+        }
+    return fields, repeat_groups
+
+
+def iter_kobo_pages(session, data_url, params=None, page_size=KOBO_API_PAGE_SIZE):
+    """
+    Yield the 'results' list of every page of the Kobo data API, following 'next'.
+    Each page body is decoded straight from the response stream, so only one
+    page of raw JSON is held in memory at a time.
+    """
+    url = data_url
+    params = {'format': 'json', 'limit': page_size, **(params or {})}
+    while url:
+        with session.get(url, params=params, timeout=60, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            page = json.load(response.raw)
+        yield page.get('results', [])
+        # 'next' already carries the paging query string
+        url = page.get('next')
+        params = None
+
+
+def _flatten_kobo_group(record, sheet, parent, submission, rows, fields, repeat_groups, counters,
+                        keep_column=None):
+    """
+    Flatten one submission (or repeat instance) into rows, recursing into repeat
+    groups. Values whose column fails keep_column are skipped.
+    """
+    counters[sheet] = counters.get(sheet, 0) + 1
+    row = {}
+    for key, value in record.items():
+        name = key.rsplit('/', 1)[-1]
+        if isinstance(value, list):
+            is_repeat = name in repeat_groups or (
+                not name.startswith('_') and value and isinstance(value[0], dict)
+            )
+            if is_repeat:
+                for instance in value:
+                    _flatten_kobo_group(instance, name, (sheet, counters[sheet]), submission,
+                                        rows, fields, repeat_groups, counters, keep_column)
+            elif name not in KOBO_DROPPED_LISTS and (keep_column is None or keep_column(name)):
+                row[name] = ', '.join(str(item) for item in value)
+            continue
+        if isinstance(value, dict) and name != '_validation_status':
+            continue
+        
+        field = fields.get(name)
+        column = name if field is None else field['label']
+        if keep_column is not None and not keep_column(column):
+            continue
+        if name == '_validation_status':
+            value = _validation_label(value)
+        if field is None:
+            row[name] = value
+            continue
+        if field['choices'] and isinstance(value, str):
+            if field['type'] == 'select_multiple':
+                value = ' '.join(field['choices'].get(choice, choice) for choice in value.split())
+            else:
+                value = field['choices'].get(value, value)
+        row[field['label']] = value
+    
+    row['_index'] = counters[sheet]
+    if parent is not None:
+        row['_parent_table_name'] = parent[0]
+        row['_parent_index'] = parent[1]
+        row.update(submission)
+    rows.setdefault(sheet, []).append(row)
+
+
+def flatten_kobo_submissions(records, fields, repeat_groups, counters, keep_column=None):
+    """
+    Split one page of API submissions into rows per sheet, mirroring the XLSX
+    export: repeat groups (child_info, child_infoo, net_repeat) become their own
+    sheets, linked back through _parent_index and the _submission__* columns.
+    counters carries the running _index per sheet across pages; keep_column
+    (see column_projection) drops unused columns while flattening.
+    """
+    rows = {}
+    for record in records:
+        submission = {
+            '_submission__id': record.get('_id'),
+            '_submission__uuid': record.get('_uuid'),
+            '_submission__submission_time': record.get('_submission_time'),
+            '_submission__validation_status': _validation_label(record.get('_validation_status')),
+        }
+        _flatten_kobo_group(record, 'main', None, submission, rows, fields, repeat_groups, counters, keep_column)
+    return rows
+
+
+def load_sheets_from_kobo_api(asset_url, token="", page_size=KOBO_API_PAGE_SIZE, params=None, session=None,
+                              keep_column=None):
+    """
+    Load all sheets from the paginated KoboToolbox data API
+    (asset_url is the asset endpoint, e.g. https://kf.kobotoolbox.org/api/v2/assets/<uid>/).
+    Each page is flattened into a columnar frame as soon as it arrives, keeping
+    only the columns that pass keep_column when given.
+    Returns (sheets_dict, load_timings) in the same shape as read_kobo_workbook.
+    """
+    session = session or kobo_api_session(token)
+    asset_url = asset_url.rstrip('/') + '/'
+    load_timings = {'download': 0.0, 'flatten': 0.0}
+    
+    start = time.perf_counter()
+    fields, repeat_groups = fetch_kobo_form(session, asset_url)
+    load_timings['form_definition'] = time.perf_counter() - start
+    
+    page_frames = {}
+    counters = {}
+    pages = iter_kobo_pages(session, asset_url + 'data/', params=params, page_size=page_size)
+    while True:
+        start = time.perf_counter()
+        records = next(pages, None)
+        load_timings['download'] += time.perf_counter() - start
+        if records is None:
+            break
         
+        start = time.perf_counter()
+        for sheet, rows in flatten_kobo_submissions(records, fields, repeat_groups, counters, keep_column).items():
+            page_frames.setdefault(sheet, []).append(pd.DataFrame.from_records(rows))
+        load_timings['flatten'] += time.perf_counter() - start
+    
+    # Numeric questions arrive as strings in the JSON payload
+    numeric_columns = {field['label'] for field in fields.values() if field['type'] in NUMERIC_FIELD_TYPES}
+    sheets_dict = {}
+    for name in SHEET_NAMES:
+        start = time.perf_counter()
+        frames = page_frames.get(name)
+        sheet = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        for col in numeric_columns.intersection(sheet.columns):
+            sheet[col] = pd.to_numeric(sheet[col], errors='coerce')
+        sheets_dict[name] = sheet
+        load_timings[name] = time.perf_counter() - start
+    
+    return sheets_dict, load_timings
+
+
+# ---------------- INCREMENTAL KOBO SYNC ----------------
+SYNC_STATE_FILE = 'sync_state.json'
+
+# Validation changes are matched on the server's timestamp; re-read a small
+# overlap so clock skew between this host and Kobo cannot drop an update
+VALIDATION_OVERLAP_SECONDS = 300
+
+
+def _sync_dir(cache_dir):
+    path = os.path.join(cache_dir, 'sync')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def read_sync_state(cache_dir):
+    """Return the persisted sync watermark, or None before the first sync"""
+    path = os.path.join(_sync_dir(cache_dir), SYNC_STATE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_synced_dataset(cache_dir, sheets_dict, state):
+    """Persist the merged sheets and then the watermark (each file replaced atomically)"""
+    path = _sync_dir(cache_dir)
+    for name in SHEET_NAMES:
+        tmp_path = os.path.join(path, f"{name}.pkl.tmp")
+        sheets_dict[name].to_pickle(tmp_path)
+        os.replace(tmp_path, os.path.join(path, f"{name}.pkl"))
+    tmp_path = os.path.join(path, SYNC_STATE_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, os.path.join(path, SYNC_STATE_FILE))
+
+
+def read_synced_dataset(cache_dir):
+    """Load the locally persisted sheets written by write_synced_dataset"""
+    path = _sync_dir(cache_dir)
+    sheets_dict = {}
+    for name in SHEET_NAMES:
+        sheet_path = os.path.join(path, f"{name}.pkl")
+        sheets_dict[name] = pd.read_pickle(sheet_path) if os.path.exists(sheet_path) else pd.DataFrame()
+    return sheets_dict
+
+
+def sync_watermark(main_df, synced_at):
+    """Highest _id/_submission_time seen so far plus the time this sync started"""
+    watermark = {'last_id': None, 'last_submission_time': None, 'synced_at': synced_at}
+    if not main_df.empty and '_id' in main_df.columns:
+        watermark['last_id'] = int(pd.to_numeric(main_df['_id'], errors='coerce').max())
+    if not main_df.empty and '_submission_time' in main_df.columns:
+        watermark['last_submission_time'] = str(main_df['_submission_time'].dropna().astype(str).max())
+    return watermark
+
+
+def kobo_delta_query(watermark):
+    """Mongo-style query for submissions that are new or were (re)validated since the watermark"""
+    conditions = []
+    if watermark.get('last_id') is not None:
+        conditions.append({'_id': {'$gt': watermark['last_id']}})
+    if watermark.get('last_submission_time'):
+        conditions.append({'_submission_time': {'$gt': watermark['last_submission_time']}})
+    conditions.append({'_validation_status.timestamp': {
+        '$gte': int(watermark['synced_at']) - VALIDATION_OVERLAP_SECONDS
+    }})
+    return {'$or': conditions}
+
+
+def merge_kobo_delta(sheets_dict, delta_dict):
+    """
+    Merge newly fetched submissions into the persisted sheets. A submission in
+    the delta replaces its old main row and all of its old repeat rows; rows
+    that did not change keep their index labels. _index/_parent_index of the
+    delta are shifted past the existing ones so they stay unique.
+    """
+    delta_main = delta_dict['main']
+    if delta_main.empty:
         return sheets_dict
     
-    except Exception as e:
-        st.error(f"❌ Error loading data from KoboToolbox: {e}")
-        st.info("Please check that your KOBO_DATA_URL is correct and accessible.")
-        return {
-            'main': pd.DataFrame(),
-            'child_info': pd.DataFrame(),
-            'child_infoo': pd.DataFrame(),
-            'net_repeat': pd.DataFrame()
-        }
+    changed_ids = set(delta_main['_id'])
+    index_offsets = {
+        name: int(sheets_dict[name]['_index'].max())
+        if not sheets_dict[name].empty and '_index' in sheets_dict[name].columns else 0
+        for name in SHEET_NAMES
+    }
+    
+    merged = {}
+    for name in SHEET_NAMES:
+        old, delta = sheets_dict[name], delta_dict[name].copy()
+        if name == 'main':
+            key = '_id'
+        else:
+            key = '_submission__id'
+        if not old.empty and key in old.columns:
+            old = old[~old[key].isin(changed_ids)]
+        if delta.empty:
+            merged[name] = old
+            continue
+        
+        if '_index' in delta.columns:
+            delta['_index'] += index_offsets[name]
+        if '_parent_index' in delta.columns and '_parent_table_name' in delta.columns:
+            delta['_parent_index'] += delta['_parent_table_name'].map(index_offsets).fillna(0).astype(int)
+        
+        # New rows get labels after the existing ones
+        start = int(sheets_dict[name].index.max()) + 1 if not sheets_dict[name].empty else 0
+        delta.index = pd.RangeIndex(start, start + len(delta))
+        merged[name] = pd.concat([old, delta]) if not old.empty else delta
+    return merged
+
+
+def sync_kobo_incremental(asset_url, token="", cache_dir=".kobo_cache", full_resync_hours=24, keep_column=None):
+    """
+    Incremental sync against the Kobo data API. The first run (and one run every
+    full_resync_hours, which also picks up edits and deletions) downloads the
+    whole project; every other run only fetches submissions past the stored
+    _id/_submission_time watermark or whose validation status changed, and
+    merges them into the locally persisted dataset. keep_column is passed to
+    load_sheets_from_kobo_api.
+    Returns (sheets_dict, load_timings, state).
+    """
+    synced_at = time.time()
+    state = read_sync_state(cache_dir)
+    full_sync = state is None or synced_at - state.get('last_full_sync', 0) > full_resync_hours * 3600
+    
+    if full_sync:
+        sheets_dict, load_timings = load_sheets_from_kobo_api(asset_url, token, keep_column=keep_column)
+        state = {'last_full_sync': synced_at, 'delta_submissions': len(sheets_dict['main'])}
+    else:
+        start = time.perf_counter()
+        stored = read_synced_dataset(cache_dir)
+        read_seconds = time.perf_counter() - start
+        
+        delta_dict, load_timings = load_sheets_from_kobo_api(
+            asset_url, token, params={'query': json.dumps(kobo_delta_query(state['watermark']))},
+            keep_column=keep_column
+        )
+        load_timings['read_local'] = read_seconds
+        
+        start = time.perf_counter()
+        sheets_dict = merge_kobo_delta(stored, delta_dict)
+        load_timings['merge'] = time.perf_counter() - start
+        state = dict(state, delta_submissions=len(delta_dict['main']))
+    
+    state['watermark'] = sync_watermark(sheets_dict['main'], synced_at)
+    start = time.perf_counter()
+    write_synced_dataset(cache_dir, sheets_dict, state)
+    load_timings['persist'] = time.perf_counter() - start
+    return sheets_dict, load_timings, state
+
+
+def empty_sheets():
+    """Sheets dictionary with every expected sheet empty"""
+    return {name: pd.DataFrame() for name in SHEET_NAMES}
+
+
+def kobo_url_configured():
+    """False while the backend's URL is empty or KOBO_DATA_URL still holds a placeholder"""
+    if KOBO_INGEST_BACKEND == "api":
+        return bool(KOBO_API_URL.strip())
+    if not KOBO_DATA_URL.strip():
+        return False
+    return not ("YOUR_ASSET_ID" in KOBO_DATA_URL or "myurl_here" in KOBO_DATA_URL or "my url here" in KOBO_DATA_URL)
+
+
+def fetch_kobo_sheets():
+    """
+    Download and parse all sheets from the configured Kobo backend.
+    Makes no Streamlit calls, so it can also run off the script thread; errors are raised.
+    """
+    keep_column = column_projection() if KOBO_PRUNE_COLUMNS else None
+    if KOBO_INGEST_BACKEND == "api":
+        if KOBO_SYNC_MODE == "incremental":
+            sheets_dict, load_timings, sync_state = sync_kobo_incremental(
+                KOBO_API_URL, KOBO_API_TOKEN, KOBO_CACHE_DIR, keep_column=keep_column
+            )
+            sheets_dict['sync_state'] = sync_state
+        else:
+            sheets_dict, load_timings = load_sheets_from_kobo_api(KOBO_API_URL, KOBO_API_TOKEN,
+                                                                  keep_column=keep_column)
+        sheets_dict['load_timings'] = load_timings
+        sheets_dict['data_version'] = compute_data_version(sheets_dict)
+        return sheets_dict
+    
+    download_start = time.perf_counter()
+    response = requests.get(KOBO_DATA_URL, timeout=60)
+    response.raise_for_status()
+    download_seconds = time.perf_counter() - download_start
+    
+    # Read all sheets from a single pass over the workbook
+    sheets_dict, load_timings = read_kobo_workbook(BytesIO(response.content), keep_column, LAZY_SHEETS)
+    sheets_dict['load_timings'] = {'download': download_seconds, **load_timings}
+    
+    sheets_dict['data_version'] = compute_data_version(sheets_dict)
+    return sheets_dict
+
+
+# Main sheet fields stored as categoricals: filters, counts and groupbys on them
+# then work on integer codes instead of hashing strings
+CATEGORY_FIELDS = ['lga', 'ward', 'community', 'community_code', 'validation_status', 'enumerator_id',
+                   'enumerator_name', 'qc_enumerator']
+
+# Fields whose every spelling present in the export is cleaned, not only the resolved one
+CLEANED_TEXT_FIELDS = ['lga', 'ward', 'community']
 
 
 def preprocess_data(sheets_dict):
@@ -507,27 +1414,26 @@ def preprocess_data(sheets_dict):
     df_main = sheets_dict['main'].copy()
     
     # Clean LGA, Ward, and Community columns - remove ALL trailing non-alphanumeric characters
-    text_cols_to_clean = [
-        'Q2. Local Government Area', 'lga', 'LGA', 'lgas',
-        'Q3.Ward', 'Q3. Ward', 'ward', 'Ward', 'wards',
-        'Q4. Community Name', 'community', 'Community', 'Community Name'
-    ]
+    text_cols_to_clean = list(dict.fromkeys(
+        col for field in CLEANED_TEXT_FIELDS for col in FIELD_SCHEMA[field]
+        if isinstance(col, str) and col in df_main.columns
+    ))
     for col in text_cols_to_clean:
-        if col in df_main.columns:
-            # Remove the � character and other problematic characters
-            df_main[col] = df_main[col].astype(str).str.replace('�', '', regex=False)
-            # Remove any trailing whitespace and non-printable characters
-            df_main[col] = df_main[col].str.strip()
-            # Remove any remaining non-alphanumeric characters from the end (except spaces in the middle)
-            df_main[col] = df_main[col].str.replace(r'[^\w\s]+$', '', regex=True)
-            df_main[col] = df_main[col].str.strip()
+        # Remove the � character and other problematic characters
+        df_main[col] = df_main[col].astype(str).str.replace('�', '', regex=False)
+        # Remove any trailing whitespace and non-printable characters
+        df_main[col] = df_main[col].str.strip()
+        # Remove any remaining non-alphanumeric characters from the end (except spaces in the middle)
+        df_main[col] = df_main[col].str.replace(r'[^\w\s]+$', '', regex=True)
+        df_main[col] = df_main[col].str.strip()
     
     # Map community codes to names - Q4. Community Name contains codes, we need to map them to actual names
-    if 'Q4. Community Name' in df_main.columns:
+    code_col = field_column(df_main, 'community_code')
+    if code_col:
         # Create a new column with actual community names
-        df_main['Community Name'] = df_main['Q4. Community Name'].astype(str).map(COMMUNITY_CODE_TO_NAME)
+        df_main['Community Name'] = df_main[code_col].astype(str).map(COMMUNITY_CODE_TO_NAME)
         # Fill any NaN values with the original code if mapping fails
-        df_main['Community Name'].fillna(df_main['Q4. Community Name'], inplace=True)
+        df_main['Community Name'] = df_main['Community Name'].fillna(df_main[code_col])
     
     # Convert date columns in main sheet
     date_cols = ['Q8. Date', '_submission_time', 'start', 'end']
@@ -535,57 +1441,366 @@ def preprocess_data(sheets_dict):
         if col in df_main.columns:
             df_main[col] = pd.to_datetime(df_main[col], errors='coerce')
     
-    # Process child_info sheet
-    if not sheets_dict['child_info'].empty:
-        df_child_info = sheets_dict['child_info'].copy()
-        # Convert age to numeric - check for both old and new date formats
-        age_col_variants = [
-            'Age of child ${child_id} as at when MDA was done (6th to 11th December 2025)',
-            'Age of child ${child_id} as at when MDA was done (19th to 25th July 2025)'
-        ]
-        for age_col in age_col_variants:
-            if age_col in df_child_info.columns:
-                df_child_info['age_months'] = pd.to_numeric(
-                    df_child_info[age_col], 
-                    errors='coerce'
-                )
-                break
-        sheets_dict['child_info'] = df_child_info
+    # Store the low-cardinality hierarchy/status/enumerator columns as categoricals
+    for col in schema_columns(df_main, CATEGORY_FIELDS):
+        df_main[col] = df_main[col].astype('category')
+    
+    # Secondary sheets; lazy handles are converted when first loaded
+    for name, prepare in SECONDARY_SHEET_PREPARERS.items():
+        sheet = sheets_dict[name]
+        if not is_lazy_sheet(sheet) and not sheet.empty:
+            sheets_dict[name] = prepare(sheet)
     
     # Process child_infoo sheet (children <5 years)
     if not sheets_dict['child_infoo'].empty:
         df_child_infoo = sheets_dict['child_infoo'].copy()
-        # Convert age column - check for both old and new date formats
-        age_col_variants = [
-            'Q88. Child name and age ${child_idd} as at when MDA was done (6th to 11th December 2025)',
-            'Q88. Child name and age ${child_idd} as at when MDA was done (19th to 25th July 2025)'
-        ]
-        for age_col in age_col_variants:
-            if age_col in df_child_infoo.columns:
-                df_child_infoo['age_months'] = pd.to_numeric(df_child_infoo[age_col], errors='coerce')
-                break
+        # Convert age column (the header names the survey round's MDA dates)
+        age_col = field_column(df_child_infoo, 'child_age')
+        if age_col:
+            df_child_infoo['age_months'] = pd.to_numeric(df_child_infoo[age_col], errors='coerce')
         sheets_dict['child_infoo'] = df_child_infoo
     
-    # Process net_repeat sheet
-    if not sheets_dict['net_repeat'].empty:
-        df_net = sheets_dict['net_repeat'].copy()
-        # Convert months column to numeric
-        months_col = 'Q81. Net ${net_id} :How many months ago did your household get the mosquito net?'
-        if months_col in df_net.columns:
-            df_net['months_since_net'] = pd.to_numeric(df_net[months_col], errors='coerce')
-        sheets_dict['net_repeat'] = df_net
-    
     sheets_dict['main'] = df_main
     return sheets_dict
 
 
-# ---------------- HELPER FUNCTION FOR FLEXIBLE COLUMN MATCHING ----------------
-def find_column(df, possible_names):
-    """Find the first matching column from a list of possible names"""
-    for name in possible_names:
-        if name in df.columns:
-            return name
-    return None
+def prepare_child_info(df_child_info):
+    """Convert the child_info sheet (children of the household)"""
+    df_child_info = df_child_info.copy()
+    # Convert age to numeric (the header names the survey round's MDA dates)
+    age_col = field_column(df_child_info, 'child_info_age')
+    if age_col:
+        df_child_info['age_months'] = pd.to_numeric(df_child_info[age_col], errors='coerce')
+    return df_child_info
+
+
+def prepare_net_repeat(df_net):
+    """Convert the net_repeat sheet (mosquito nets)"""
+    df_net = df_net.copy()
+    # Convert months column to numeric
+    months_col = field_column(df_net, 'net_months_ago')
+    if months_col:
+        df_net['months_since_net'] = pd.to_numeric(df_net[months_col], errors='coerce')
+    return df_net
+
+
+SECONDARY_SHEET_PREPARERS = {'child_info': prepare_child_info, 'net_repeat': prepare_net_repeat}
+
+
+# ---------------- ON-DISK SNAPSHOT STORE ----------------
+# Preprocessed sheets are written as Feather (Arrow IPC) files under
+# KOBO_CACHE_DIR/store/<data_version>/ so a restarted app can serve the last
+# snapshot by memory-mapping it instead of waiting on Kobo
+STORE_CURRENT_FILE = 'CURRENT'
+STORE_META_FILE = 'meta.json'
+STORE_KEEP_VERSIONS = 2
+# Export kept for lazy sheets that were not loaded when the snapshot was written
+STORE_WORKBOOK_FILE = 'export.xlsx'
+
+
+def _store_dir(cache_dir):
+    return os.path.join(cache_dir, 'store')
+
+
+def _arrow_table(frame):
+    """
+    Convert a sheet to an Arrow table. Object columns that mix types (e.g. numbers
+    and text in one Kobo column) cannot be stored as-is and are written as text.
+    """
+    try:
+        return pa.Table.from_pandas(frame, preserve_index=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        frame = frame.copy()
+        for col in frame.columns[frame.dtypes == object]:
+            try:
+                pa.array(frame[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                frame[col] = frame[col].where(frame[col].isna(), frame[col].astype(str))
+        return pa.Table.from_pandas(frame, preserve_index=True)
+
+
+def write_sheet_store(cache_dir, sheets_dict):
+    """
+    Persist preprocessed sheets under their data version and point CURRENT at it.
+    Versions already on disk are not rewritten; older versions are pruned.
+    Returns True when the store holds this version afterwards.
+    """
+    data_version = sheets_dict.get('data_version')
+    if not data_version:
+        return False
+    store_dir = _store_dir(cache_dir)
+    version_dir = os.path.join(store_dir, data_version)
+    
+    if not os.path.exists(os.path.join(version_dir, STORE_META_FILE)):
+        tmp_dir = version_dir + '.tmp'
+        os.makedirs(tmp_dir, exist_ok=True)
+        lazy_sheets = {}
+        for name in SHEET_NAMES:
+            sheet = sheets_dict[name]
+            # Holding load keeps a spooled workbook on disk while it is copied
+            load, source = (sheet['load'], sheet['source']) if is_lazy_sheet(sheet) else (None, None)
+            if load is not None and source is not None:
+                # Still unread: store its workbook instead of loading it now
+                lazy_sheets[name] = sheet['fingerprint']
+                workbook_path = os.path.join(tmp_dir, STORE_WORKBOOK_FILE)
+                if not os.path.exists(workbook_path):
+                    shutil.copyfile(source, workbook_path)
+                continue
+            feather.write_feather(_arrow_table(get_sheet(sheets_dict, name)), os.path.join(tmp_dir, f"{name}.feather"),
+                                  compression='uncompressed')
+        meta = {
+            'data_version': data_version,
+            'written_at': time.time(),
+            'load_timings': sheets_dict.get('load_timings', {}),
+            'sync_state': sheets_dict.get('sync_state'),
+            'dropped_columns': sheets_dict.get('dropped_columns'),
+            'lazy_sheets': lazy_sheets,
+        }
+        with open(os.path.join(tmp_dir, STORE_META_FILE), 'w') as f:
+            json.dump(meta, f)
+        if os.path.exists(version_dir):
+            shutil.rmtree(version_dir)
+        os.replace(tmp_dir, version_dir)
+    
+    tmp_path = os.path.join(store_dir, STORE_CURRENT_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        f.write(data_version)
+    os.replace(tmp_path, os.path.join(store_dir, STORE_CURRENT_FILE))
+    
+    # Keep the newest versions only, and older ones whose workbook a served
+    # snapshot still reads; they go on a later write
+    versions = [entry for entry in os.listdir(store_dir)
+                if os.path.exists(os.path.join(store_dir, entry, STORE_META_FILE))]
+    versions.sort(key=lambda entry: os.path.getmtime(os.path.join(store_dir, entry, STORE_META_FILE)))
+    for stale in versions[:-STORE_KEEP_VERSIONS]:
+        if stale != data_version and not workbook_in_use(os.path.join(store_dir, stale, STORE_WORKBOOK_FILE)):
+            shutil.rmtree(os.path.join(store_dir, stale), ignore_errors=True)
+    return True
+
+
+def read_sheet_store(cache_dir):
+    """
+    Memory-map the current snapshot from the store. Returns the preprocessed
+    sheets_dict (with 'stored_at' set), or None when there is no usable snapshot.
+    Numeric columns without nulls stay read-only views of the mapped file; the
+    rest are converted one column at a time. Sheets stored as a workbook come
+    back as lazy handles.
+    """
+    store_dir = _store_dir(cache_dir)
+    try:
+        with open(os.path.join(store_dir, STORE_CURRENT_FILE)) as f:
+            version_dir = os.path.join(store_dir, f.read().strip())
+        with open(os.path.join(version_dir, STORE_META_FILE)) as f:
+            meta = json.load(f)
+        
+        sheets_dict = {}
+        lazy_sheets = meta.get('lazy_sheets', {})
+        keep_column = column_projection() if KOBO_PRUNE_COLUMNS else None
+        if lazy_sheets:
+            sheets_dict.update(workbook_lazy_sheets(os.path.join(version_dir, STORE_WORKBOOK_FILE),
+                                                    list(lazy_sheets), keep_column, fingerprints=lazy_sheets))
+        for name in SHEET_NAMES:
+            if name in lazy_sheets:
+                continue
+            table = feather.read_table(os.path.join(version_dir, f"{name}.feather"), memory_map=True)
+            # One block per column and no second copy of the table while converting
+            sheets_dict[name] = table.to_pandas(split_blocks=True, self_destruct=True)
+            del table
+    except (OSError, ValueError, pa.ArrowException):
+        return None
+    
+    sheets_dict['data_version'] = meta['data_version']
+    sheets_dict['load_timings'] = meta.get('load_timings', {})
+    if meta.get('sync_state'):
+        sheets_dict['sync_state'] = meta['sync_state']
+    if meta.get('dropped_columns'):
+        sheets_dict['dropped_columns'] = meta['dropped_columns']
+    sheets_dict['stored_at'] = meta['written_at']
+    return sheets_dict
+
+
+@st.cache_resource
+def get_dataset_holder():
+    """
+    Process-wide holder of the dataset served to every session. A background
+    thread refreshes it from Kobo and swaps in new snapshots under the lock.
+    Snapshots are shared and may come from the store with read-only columns
+    (see read_sheet_store): never modify their frames in place.
+    """
+    return {
+        'lock': threading.Lock(),
+        'first_load': threading.Lock(),
+        'wake': threading.Event(),
+        'thread': None,
+        'sheets': None,
+        'fetched_at': None,
+        'attempted_at': None,
+        'failures': 0,
+        'error': None,
+        'refreshing': False,
+        'requested_at': None,
+    }
+
+
+def refresh_dataset(holder):
+    """
+    Fetch the sheets from Kobo and swap them in. A data version that is already
+    being served is not preprocessed again; failures keep the last good snapshot.
+    """
+    with holder['lock']:
+        holder['refreshing'] = True
+    try:
+        sheets_dict = fetch_kobo_sheets()
+        with holder['lock']:
+            current = holder['sheets']
+        if current is not None and current.get('data_version') == sheets_dict['data_version']:
+            sheets_dict = current
+        else:
+            sheets_dict = preprocess_data(sheets_dict)
+            try:
+                write_sheet_store(KOBO_CACHE_DIR, sheets_dict)
+            except Exception:
+                # The store is only a start-up accelerator; never fail a refresh over it
+                pass
+        with holder['lock']:
+            holder['sheets'] = sheets_dict
+            holder['fetched_at'] = time.time()
+            holder['failures'] = 0
+            holder['error'] = None
+    except Exception as e:
+        with holder['lock']:
+            holder['failures'] += 1
+            holder['error'] = str(e)
+    finally:
+        with holder['lock']:
+            holder['attempted_at'] = time.time()
+            holder['refreshing'] = False
+
+
+def refresh_wait_seconds(holder, now):
+    """
+    Seconds until the next scheduled refresh (call under holder['lock']):
+    KOBO_REFRESH_SECONDS after the last attempt, or an exponential backoff from
+    KOBO_RETRY_SECONDS (capped at KOBO_REFRESH_SECONDS) after failed ones.
+    """
+    last_attempt = holder['attempted_at'] or holder['fetched_at']
+    if last_attempt is None:
+        return 0
+    interval = KOBO_REFRESH_SECONDS
+    if holder['failures']:
+        interval = min(interval, KOBO_RETRY_SECONDS * 2 ** (holder['failures'] - 1))
+    # Never retry back to back, whatever the configured interval
+    return max(interval, 1) - (now - last_attempt)
+
+
+def request_dataset_refresh(holder):
+    """
+    Ask the background refresher to fetch from Kobo now. Requests made while a
+    refresh is running, or within KOBO_REFRESH_COOLDOWN_SECONDS of the last fetch
+    or request, are coalesced into that one. Returns True if a refresh was scheduled.
+    """
+    now = time.time()
+    with holder['lock']:
+        last = max(holder['attempted_at'] or 0, holder['fetched_at'] or 0, holder['requested_at'] or 0)
+        if holder['refreshing'] or now - last < KOBO_REFRESH_COOLDOWN_SECONDS:
+            return False
+        holder['requested_at'] = now
+    holder['wake'].set()
+    return True
+
+
+def _dataset_refresh_loop(holder):
+    """Refresh the dataset every KOBO_REFRESH_SECONDS (backing off after failures), or sooner when woken"""
+    while True:
+        with holder['lock']:
+            wait_seconds = refresh_wait_seconds(holder, time.time())
+        if wait_seconds > 0:
+            holder['wake'].wait(wait_seconds)
+        holder['wake'].clear()
+        refresh_dataset(holder)
+
+
+def start_dataset_refresher(holder):
+    """Start the background refresh thread once per process"""
+    with holder['lock']:
+        if holder['thread'] is None or not holder['thread'].is_alive():
+            holder['thread'] = threading.Thread(target=_dataset_refresh_loop, args=(holder,), daemon=True)
+            holder['thread'].start()
+
+
+def load_sheets():
+    """
+    Return (sheets_dict, fetched_at) for the dashboard: the preprocessed snapshot
+    currently served and when it was last confirmed against Kobo. Only the very
+    first load of a process without a stored snapshot waits for Kobo; after that
+    the background refresher keeps the snapshot current.
+    The frames are shared with every session and can be read-only (see
+    get_dataset_holder): filter or copy them before changing anything; writing
+    into them with .loc/.iloc/.at or inplace=True can raise "assignment
+    destination is read-only".
+    """
+    if not kobo_url_configured():
+        st.warning("⚠️ KoboToolbox URL is not configured. Please set KOBO_DATA_URL "
+                   "(KOBO_API_URL for the API backend) in the Streamlit secrets.")
+        return empty_sheets(), None
+    
+    holder = get_dataset_holder()
+    with holder['lock']:
+        if holder['sheets'] is None and holder['thread'] is None:
+            # Cold process: serve the last snapshot from the on-disk store
+            stored = read_sheet_store(KOBO_CACHE_DIR)
+            if stored is not None:
+                holder['sheets'] = stored
+                holder['fetched_at'] = stored['stored_at']
+        has_snapshot = holder['sheets'] is not None
+    
+    if not has_snapshot:
+        with st.spinner("📊 Loading data from KoboToolbox..."):
+            with holder['first_load']:
+                with holder['lock']:
+                    has_snapshot = holder['sheets'] is not None
+                    # After a failed first load, sessions wait for the backoff like the refresher
+                    backing_off = holder['failures'] and refresh_wait_seconds(holder, time.time()) > 0
+                if not has_snapshot and not backing_off:
+                    refresh_dataset(holder)
+    
+    start_dataset_refresher(holder)
+    
+    with holder['lock']:
+        sheets_dict, fetched_at, error = holder['sheets'], holder['fetched_at'], holder['error']
+    if sheets_dict is None:
+        st.error(f"❌ Error loading data from KoboToolbox: {error}")
+        st.info("Please check that your KOBO_DATA_URL is correct and accessible.")
+        return empty_sheets(), None
+    if error:
+        st.warning(f"⚠️ Showing the last good snapshot; the latest refresh from KoboToolbox failed: {error}")
+    return sheets_dict, fetched_at
+
+
+def format_snapshot_age(fetched_at):
+    """Human-readable age of the served snapshot, e.g. '4 min ago'"""
+    age = max(0, time.time() - fetched_at)
+    if age < 60:
+        return "just now"
+    if age < 3600:
+        return f"{int(age // 60)} min ago"
+    if age < 86400:
+        return f"{age / 3600:.1f} h ago"
+    return f"{age / 86400:.1f} days ago"
+
+
+# ---------------- TEXT MATCHING HELPERS ----------------
+def text_contains(series, pattern):
+    """
+    Case-insensitive series.astype(str).str.contains(pattern). Categorical columns
+    are matched once per category and the result is taken by code.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        matched = series.cat.categories.astype(str).str.contains(pattern, case=False, na=False)
+        # Code -1 (missing) picks the trailing False
+        matched = np.append(np.asarray(matched, dtype=bool), False)
+        return pd.Series(matched[series.cat.codes.to_numpy()], index=series.index)
+    return series.astype(str).str.contains(pattern, case=False, na=False)
 
 
 def format_display_text(text):
@@ -597,13 +1812,76 @@ def format_display_text(text):
     return text.title()
 
 
+# ---------------- SIDEBAR FILTER INDEX ----------------
+# Sidebar dimension -> canonical field
+FILTER_DIMENSIONS = {'lga': 'lga', 'ward': 'ward', 'community': 'community', 'status': 'validation_status'}
+
+
+def build_filter_index(df):
+    """
+    Build the sidebar filter index for the main sheet: per dimension the distinct
+    values, each row's value code and one row bitmap per value, plus each row's
+    date bucket (day). Filters are then answered by intersecting bitmaps.
+    """
+    filter_index = {'n_rows': len(df), 'columns': {}, 'values': {}, 'codes': {}, 'bitmaps': {},
+                    'date_col': None, 'days': None}
+    
+    for dim, field in FILTER_DIMENSIONS.items():
+        col = field_column(df, field)
+        filter_index['columns'][dim] = col
+        if col is None:
+            continue
+        categorical = pd.Categorical(df[col])
+        codes = np.asarray(categorical.codes)
+        values = np.asarray(categorical.categories, dtype=object)
+        filter_index['values'][dim] = values
+        filter_index['codes'][dim] = codes
+        filter_index['bitmaps'][dim] = [codes == code for code in range(len(values))]
+    
+    date_col = field_column(df, 'date')
+    if date_col:
+        filter_index['date_col'] = date_col
+        dates = pd.to_datetime(df[date_col], errors='coerce')
+        if dates.dt.tz is not None:
+            # Bucket by the local calendar day, as the date picker shows it
+            dates = dates.dt.tz_localize(None)
+        filter_index['days'] = dates.to_numpy(dtype='datetime64[D]')
+    
+    return filter_index
+
+
+@st.cache_resource(show_spinner=False, max_entries=2 * (1 + len(LGA_CREDENTIALS)))
+def get_filter_index(data_version, scope, _df):
+    """Build the sidebar filter index once per data version and scope (None or an LGA partition)"""
+    note_cache_miss('get_filter_index')
+    return build_filter_index(_df)
+
+
+def value_bitmap(filter_index, dim, value):
+    """Rows whose dim equals value"""
+    matches = np.flatnonzero(filter_index['values'][dim] == value)
+    if len(matches) == 0:
+        return np.zeros(filter_index['n_rows'], dtype=bool)
+    return filter_index['bitmaps'][dim][matches[0]]
+
+
+def filter_options(filter_index, dim, row_mask):
+    """Sorted distinct values of dim among the selected rows"""
+    codes = filter_index['codes'][dim][row_mask]
+    present = np.unique(codes[codes >= 0])
+    return sorted(filter_index['values'][dim][present].tolist())
+
+
 # ---------------- METRICS CALCULATION ----------------
 def calculate_metrics(df):
     """Calculate key metrics from the dataset"""
+    schema = schema_of(df)
+    status_col = schema['validation_status']
+    
     # Filter out "Not Approved" records from total submissions count
-    df_valid = df.copy()
-    if '_validation_status' in df.columns:
-        df_valid = df[~df['_validation_status'].astype(str).str.contains('Not Approved', case=False, na=False)]
+    df_valid = df
+    if status_col:
+        df_valid = df[~text_contains(df[status_col], 'Not Approved')]
     
     metrics = {
         'total_submissions': len(df_valid),  # Count only non-"Not Approved" records
@@ -620,36 +1898,14 @@ def calculate_metrics(df):
     if df.empty:
         return metrics
     
-    # Flexible column name matching for LGA (case-insensitive)
-    lga_cols = ['lgas', 'lga', 'Q2. Local Government Area', 'LGA', 'Local Government Area', 'Lgas']
-    for col in lga_cols:
-        if col in df_valid.columns:
-            metrics['total_lgas'] = df_valid[col].nunique()
-            break
-    
-    # Flexible column name matching for Ward (case-insensitive)
-    ward_cols = ['wards', 'ward', 'Q3.Ward', 'Q3. Ward', 'Ward', 'Wards']
-    for col in ward_cols:
-        if col in df_valid.columns:
-            metrics['total_wards'] = df_valid[col].nunique()
-            break
-    
-    # Flexible column name matching for Community
-    community_cols = ['Community Name', 'Q4. Community Name', 'community', 'Community']
-    for col in community_cols:
-        if col in df_valid.columns:
-            metrics['total_communities'] = df_valid[col].nunique()
-            break
-    
-    # Flexible column name matching for Enumerator - ADDED username
-    enum_cols = ['username', 'Enumerator id', 'Type in your Name', 'enumerator', 'Enumerator']
-    for col in enum_cols:
-        if col in df_valid.columns:
-            metrics['total_enumerators'] = df_valid[col].nunique()
-            break
+    # Distinct LGAs, wards, communities and enumerators among counted records
+    for metric, field in [('total_lgas', 'lga'), ('total_wards', 'ward'),
+                          ('total_communities', 'community'), ('total_enumerators', 'enumerator_id')]:
+        if schema[field]:
+            metrics[metric] = df_valid[schema[field]].nunique()
     
-    if '_validation_status' in df.columns:
-        status_counts = df['_validation_status'].value_counts()
+    if status_col:
+        status_counts = df[status_col].value_counts()
         metrics['approved'] = status_counts.get('Approved', 0)
         metrics['pending'] = status_counts.get('Not Validated', 0) + status_counts.get('On Hold', 0)
         metrics['rejected'] = status_counts.get('Rejected', 0) + status_counts.get('Not Approved', 0)
@@ -667,7 +1923,9 @@ def identify_data_quality_issues(df):
     if df.empty:
         return issues
     
-    # Check for missing values in key columns
+    schema = schema_of(df)
+    
+    # Check for missing values in key columns (these exact headers, not schema fields)
     key_cols = ['Q2. Local Government Area', 'Q4. Community Name', 'Q8. Date', 'Enumerator id']
     for col in key_cols:
         if col in df.columns:
@@ -679,8 +1937,8 @@ def identify_data_quality_issues(df):
                 })
     
     # Check for duplicates
-    if '_uuid' in df.columns:
-        duplicates = df['_uuid'].duplicated().sum()
+    if schema['uuid']:
+        duplicates = df[schema['uuid']].duplicated().sum()
         if duplicates > 0:
             issues.append({
                 'type': 'danger',
@@ -688,8 +1946,8 @@ def identify_data_quality_issues(df):
             })
     
     # Check for rejected submissions
-    if '_validation_status' in df.columns:
-        rejected = (df['_validation_status'] == 'Rejected').sum()
+    if schema['validation_status']:
+        rejected = (df[schema['validation_status']] == 'Rejected').sum()
         if rejected > 0:
             issues.append({
                 'type': 'danger',
@@ -734,6 +1992,79 @@ def create_community_coverage_table(df):
     return None
 
 
+def build_coverage_summary(df, filter_state):
+    """
+    Planned vs reached households per (LGA, Ward, community code) from one grouped
+    count, excluding "Not Approved" records. Planned communities inside the
+    LGA/ward/community filters that have no submissions are listed as Not Started.
+    Returns None when the community column is missing.
+    """
+    schema = schema_of(df)
+    q4_col = schema['community_code']
+    lga_col = schema['coverage_lga']
+    ward_col = schema['coverage_ward']
+    validation_status_col = schema['validation_status']
+    
+    if not q4_col:
+        return None
+    
+    coverage_df = df
+    if validation_status_col:
+        coverage_df = coverage_df[~text_contains(coverage_df[validation_status_col], 'Not Approved')]
+    
+    # Reached households per (LGA, Ward, community code), listed LGA by LGA and
+    # ward by ward in order of first submission
+    keys = pd.DataFrame({
+        'LGA': coverage_df[lga_col] if lga_col else 'N/A',
+        'Ward': coverage_df[ward_col] if ward_col else 'N/A',
+        'Code': coverage_df[q4_col],
+    }, index=coverage_df.index)
+    reached = keys.groupby(['LGA', 'Ward', 'Code'], sort=False, observed=True).size().reset_index(name='Reached HH')
+    reached = reached.astype({'LGA': object, 'Ward': object, 'Code': object})
+    reached['_lga_rank'] = pd.factorize(reached['LGA'])[0]
+    reached['_ward_rank'] = pd.factorize(pd.MultiIndex.from_frame(reached[['LGA', 'Ward']]))[0]
+    reached = reached.sort_values(['_lga_rank', '_ward_rank'], kind='mergesort')
+    reached['Code'] = reached['Code'].astype(str)
+    
+    # Planned communities in the filtered area with no submissions
+    planned = COMMUNITY_DF.assign(Code=COMMUNITY_DF['community_name'].astype(str))
+    if filter_state.get('lga'):
+        planned = planned[planned['Q2. Local Government Area'].str.lower() == str(filter_state['lga']).lower()]
+    if filter_state.get('ward'):
+        planned = planned[planned['Q3.Ward'].str.lower() == str(filter_state['ward']).lower()]
+    if filter_state.get('community'):
+        community = str(filter_state['community'])
+        planned = planned[(planned['Q4. Community Name'] == community) | (planned['Code'] == community)]
+    not_started = planned[~planned['Code'].isin(reached['Code'])]
+    not_started = pd.DataFrame({
+        'LGA': not_started['Q2. Local Government Area'],
+        'Ward': not_started['Q3.Ward'],
+        'Code': not_started['Code'],
+        'Reached HH': 0,
+    })
+    
+    summary = pd.concat([reached[['LGA', 'Ward', 'Code', 'Reached HH']], not_started], ignore_index=True)
+    summary['Community'] = summary['Code'].map(COMMUNITY_CODE_TO_NAME).fillna(summary['Code'])
+    summary['Planned HH'] = summary['Code'].map(COMMUNITY_PLANNED_HH).fillna(0).astype(int)
+    summary['Reached HH'] = summary['Reached HH'].astype(int)
+    
+    planned_hh = summary['Planned HH']
+    reached_hh = summary['Reached HH']
+    summary['Coverage %'] = (reached_hh / planned_hh.where(planned_hh > 0) * 100).fillna(0).round(1)
+    target_met = reached_hh >= planned_hh
+    summary['Status'] = np.select([target_met, reached_hh > 0], ["✅ Target Met", "⚠️ In Progress"], "❌ Not Started")
+    summary['Status_Color'] = np.where(target_met, 'green', 'red')
+    
+    return summary[['LGA', 'Ward', 'Community', 'Planned HH', 'Reached HH', 'Coverage %', 'Status', 'Status_Color']]
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def get_coverage_summary(data_version, scope, filter_key, _df):
+    """Coverage summary cached per data version, scope (None or an LGA partition) and sidebar filter state"""
+    note_cache_miss('get_coverage_summary')
+    return build_coverage_summary(_df, dict(filter_key))
+
+
 # ---------------- VISUALIZATION FUNCTIONS ----------------
 def render_metric_card(label, value, card_class=""):
     return f"""
@@ -748,18 +2079,12 @@ def create_lga_distribution_chart(df):
     if df.empty:
         return None
     
-    # Flexible column name matching for LGA (including plural)
-    lga_col = None
-    lga_cols = ['lgas', 'lga', 'Q2. Local Government Area', 'LGA', 'Local Government Area', 'Lgas']
-    for col in lga_cols:
-        if col in df.columns:
-            lga_col = col
-            break
-    
+    lga_col = field_column(df, 'lga')
     if lga_col is None:
         return None
     
-    lga_counts = df[lga_col].value_counts().reset_index()
+    lga_counts = df[lga_col].value_counts()
+    lga_counts = lga_counts[lga_counts > 0].reset_index()
     lga_counts.columns = ['LGA', 'Submissions']
     
     # Format LGA names to proper case
@@ -775,10 +2100,12 @@ def create_lga_distribution_chart(df):
 
 
 def create_validation_status_chart(df):
-    if df.empty or '_validation_status' not in df.columns:
+    status_col = field_column(df, 'validation_status') if not df.empty else None
+    if status_col is None:
         return None
     
-    status_counts = df['_validation_status'].value_counts().reset_index()
+    status_counts = df[status_col].value_counts()
+    status_counts = status_counts[status_counts > 0].reset_index()
     status_counts.columns = ['Status', 'Count']
     
     color_map = {
@@ -801,18 +2128,12 @@ def create_ward_distribution_chart(df):
     if df.empty:
         return None
     
-    # Flexible column name matching for Ward (including plural)
-    ward_col = None
-    ward_cols = ['wards', 'ward', 'Q3.Ward', 'Q3. Ward', 'Ward', 'Wards']
-    for col in ward_cols:
-        if col in df.columns:
-            ward_col = col
-            break
-    
+    ward_col = field_column(df, 'ward')
     if ward_col is None:
         return None
     
-    ward_counts = df[ward_col].value_counts().head(15).reset_index()
+    ward_counts = df[ward_col].value_counts()
+    ward_counts = ward_counts[ward_counts > 0].head(15).reset_index()
     ward_counts.columns = ['Ward', 'Submissions']
     
     # Format Ward names to proper case
@@ -831,18 +2152,12 @@ def create_timeline_chart(df):
     if df.empty:
         return None
     
-    # Flexible column name matching for date
-    date_col = None
-    date_cols = ['Q8. Date', '_submission_time', 'start', 'Date', 'date', 'submission_time']
-    for col in date_cols:
-        if col in df.columns:
-            date_col = col
-            break
-    
+    date_col = field_column(df, 'date')
     if date_col is None:
         return None
     
-    df_timeline = df.copy()
+    # Only the date column is needed
+    df_timeline = df[[date_col]].copy()
     df_timeline[date_col] = pd.to_datetime(df_timeline[date_col], errors='coerce')
     df_timeline = df_timeline.dropna(subset=[date_col])
     
@@ -861,378 +2176,918 @@ def create_timeline_chart(df):
     return fig
 
 
+# ---------------- QC RULE ENGINE ----------------
+QC_ISSUE_COLUMNS = ['LGA', 'Ward', 'Community', 'Unique HH ID', 'Enumerator',
+                    'Validation Status', 'Issue Type', 'Description', 'Row Index', 'HH Row']
+
+
+# Rule groups: per-household rules, per-child rules, and the two rules that
+# compare households (shared unique_code, enumerator-wide amenity pattern)
+QC_CHECK_GROUPS = ('household', 'child', 'duplicate', 'enumerator_pattern')
+DUPLICATE_ISSUE_TYPE = 'HH Duplicate (unique_code)'
+ENUMERATOR_PATTERN_ISSUE_TYPE = 'Urban HH No Amenities (Enumerator Pattern)'
+
+
+def as_text(series):
+    """Convert a column to display strings, showing missing values as N/A"""
+    return series.astype(str).where(series.notna(), 'N/A')
+
+
+def blank_or_no(series):
+    """
+    Boolean array: the value, stripped and lower-cased, is "no" or empty.
+    Evaluated once per distinct value; missing values count as answered.
+    """
+    codes, uniques = pd.factorize(series)
+    matched = [str(value).strip().lower() in ('no', '') for value in uniques]
+    # Code -1 (missing) picks the trailing False
+    return np.array(matched + [False], dtype=bool)[codes]
+
+
+def title_case(series):
+    """Vectorized equivalent of format_display_text for a whole column"""
+    return series.astype(str).str.title().where(series.notna(), series)
+
+
+def gather_column(df, col):
+    """Return df[col] as objects, or an all-'N/A' column when the column was not found"""
+    if col:
+        return df[col].astype(object)
+    return pd.Series('N/A', index=df.index, dtype=object)
+
+
+def build_issue_frame(df, mask, issue_type, description, id_cols, fields=(), hh_rows=None):
+    """
+    Build the QC issue rows for every row of df selected by a boolean mask.
+    Only the household columns and the extra `fields` used by the description
+    are gathered; description is a fixed string or a function of those rows.
+    'HH Row' is the household's main-sheet index label (hh_rows maps df rows to
+    it when df is not the main sheet), used to slice results by sidebar filters.
+    """
+    used_cols = list(dict.fromkeys([col for col in id_cols.values() if col] + list(fields)))
+    flagged = df.loc[mask, used_cols]
+    if flagged.empty:
+        return pd.DataFrame(columns=QC_ISSUE_COLUMNS)
+    
+    return pd.DataFrame({
+        'LGA': gather_column(flagged, id_cols['lga']),
+        'Ward': gather_column(flagged, id_cols['ward']),
+        'Community': gather_column(flagged, id_cols['community']),
+        'Unique HH ID': gather_column(flagged, id_cols['unique_code']),
+        'Enumerator': gather_column(flagged, id_cols['enumerator']),
+        'Validation Status': gather_column(flagged, id_cols['validation_status']),
+        'Issue Type': issue_type,
+        'Description': description(flagged) if callable(description) else description,
+        'Row Index': flagged.index,
+        'HH Row': flagged.index if hh_rows is None else hh_rows[flagged.index],
+    }, index=flagged.index)
+
+
+def combine_issue_frames(frames):
+    """Concatenate per-check issue frames into the final qc_df"""
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=QC_ISSUE_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+# ---------------- CHILD RECORD LINKAGE ----------------
+PARENT_PREFIX = 'parent_'
+
+# Household fields copied onto every child row as PARENT_PREFIX + field; they
+# resolve like any other field on the linked frame
+PARENT_FIELDS = ['lga', 'ward', 'community', 'unique_code', 'enumerator_name', 'validation_status', 'q102', 'q86']
+FIELD_SCHEMA.update({PARENT_PREFIX + field: [PARENT_PREFIX + field] for field in PARENT_FIELDS})
+
+
+def link_child_records(df, child_df):
+    """
+    Join every child_infoo row to its parent household with a single indexed merge
+    (child_infoo._submission__uuid -> main _uuid). The household columns used by
+    the cross-sheet QC rules are added with a 'parent_' prefix, and _parent_row
+    holds the parent's index label in df (-1 when no parent was found).
+    """
+    schema = schema_of(df)
+    uuid_col = schema['uuid']
+    if not uuid_col or '_submission__uuid' not in child_df.columns:
+        return child_df.assign(_parent_row=-1)
+    
+    parent_cols = {field: schema[field] for field in PARENT_FIELDS}
+    
+    # One row per household uuid (first submission wins), indexed for the join
+    parents = df[df[uuid_col].notna() & ~df[uuid_col].duplicated()]
+    parent_frame = pd.DataFrame(
+        {PARENT_PREFIX + field: parents[col].astype(object) for field, col in parent_cols.items() if col},
+        index=parents.index
+    )
+    parent_frame['_parent_row'] = parents.index
+    parent_frame.index = parents[uuid_col]
+    
+    linked = child_df.join(parent_frame, on='_submission__uuid')
+    linked['_parent_row'] = linked['_parent_row'].fillna(-1).astype(int)
+    return linked
+
+
 # ---------------- QC CHECKS FUNCTION ----------------
-def perform_qc_checks(df, child_df=None):
+# Issue frame household columns (see build_issue_frame) -> canonical field
+QC_ID_FIELDS = {
+    'lga': 'lga',
+    'ward': 'ward',
+    'community': 'community',
+    'unique_code': 'unique_code',
+    'enumerator': 'enumerator_name',
+    'validation_status': 'validation_status',
+}
+
+AMENITY_COLUMNS = ['Q23. Electricity', 'Q24. Radio', 'Q25. Television', 'Q26. A non-mobile telephone',
+                   'Q27. Computer', 'Q28. Refrigerator', 'Q29. Chair', 'Q30. Bed', 'Q31. Sofa',
+                   'Q32. Cupboard', 'Q33. Animal-drawn cart (donkey, horse, camel)', 'Q34. Bicycle',
+                   'Q35. Motorcycle or motor scooter', 'Q36. Car or truck', 'Q37. Boat with motor',
+                   'Q38. Canoe', 'Q39. Keke Napep', 'Q40. Fan', 'Q41. Watch', 'Q42. Mobile telephone',
+                   'Q43. Table', 'Q44. Electric Iron', 'Q45. Bank account', 'Q46. Air condition', 'Q47. Generator']
+
+# child_infoo fields the child rules read, besides the parent_ fields from link_child_records
+CHILD_FIELDS = ['child_age', 'q94', 'q95', 'q90']
+
+
+def is_yes(series):
+    return series.astype(str).str.contains('yes', case=False, na=False)
+
+
+def minutes(series):
+    return pd.to_numeric(series, errors='coerce')
+
+
+def child_text(flagged, col):
+    return as_text(flagged[col]) if col in flagged.columns else 'N/A'
+
+
+def urban_no_amenities(frame, cols):
+    """Urban rows of enumerators whose urban households all have every amenity "No" or blank"""
+    urban = text_contains(frame[cols['settlement']], 'Urban')
+    urban_df = frame[urban]
+    if urban_df.empty:
+        return urban
+    # Flag rows with every amenity "No" or blank, then enumerators with only such rows
+    all_no = np.logical_and.reduce([blank_or_no(urban_df[col]) for col in cols['amenities']])
+    enumerator_all_no = pd.Series(all_no, index=urban_df.index).groupby(
+        urban_df[cols['enumerator']], observed=True
+    ).all()
+    flagged_enumerators = enumerator_all_no.index[enumerator_all_no.to_numpy()]
+    return urban & frame[cols['enumerator']].isin(flagged_enumerators)
+
+
+def duplicate_unique_codes(frame, cols):
+    """Rows sharing a unique_code, ignoring "Not Approved" records"""
+    dup_codes = frame[cols['unique_code']]
+    if cols['validation_status']:
+        dup_codes = dup_codes[~text_contains(frame[cols['validation_status']], 'Not Approved')]
+    return dup_codes.duplicated(keep=False).reindex(frame.index, fill_value=False)
+
+
+# QC rules in output order. Each rule names its sheet ('main' or 'child_infoo'),
+# its group (see QC_CHECK_GROUPS) and the columns it needs by role:
+#   columns         role -> canonical field (see FIELD_SCHEMA), all required
+#   optional        role -> canonical field, None when missing
+#   column_lists    role -> names, keeps the present ones (at least one required)
+#   each_column     column-name test; the rule runs once per matching column as 'value'
+# predicate(frame, cols) returns the flagged-row mask and description(flagged, cols)
+# the issue text; 'fields' lists roles the description reads. Child rules with
+# in_scope_only only flag children whose household is in the checked frame.
+QC_RULES = [
+    {
+        'name': 'Age Inconsistencies',
+        'sheet': 'main',
+        'group': 'household',
+        'columns': {'q22': 'years_living', 'q13': 'hh_head_age'},
+        'predicate': lambda frame, cols: minutes(frame[cols['q22']]) > minutes(frame[cols['q13']]),
+        'description': lambda flagged, cols: ('Years of Living (' + as_text(flagged[cols['q22']]) +
+                                              ') > HH Head Age (' + as_text(flagged[cols['q13']]) + ')'),
+        'fields': ['q22', 'q13'],
+    },
+    {
+        'name': 'Education-Occupation Mismatch',
+        'sheet': 'main',
+        'group': 'household',
+        'columns': {'education': 'education', 'occupation': 'occupation'},
+        'predicate': lambda frame, cols: (
+            frame[cols['education']].astype(str).str.contains('No Formal Education', case=False, na=False) &
+            frame[cols['occupation']].astype(str).str.contains('Professional|technical|managerial', case=False, na=False)
+        ),
+        'description': 'No formal education but professional occupation',
+    },
+    {
+        'name': 'Negative Children Count',
+        'sheet': 'main',
+        'group': 'household',
+        'each_column': lambda col: 'child' in col.lower() and 'total' in col.lower(),
+        'predicate': lambda frame, cols: minutes(frame[cols['value']]) < 0,
+        'description': lambda flagged, cols: f"Negative value in {cols['value']}: " + as_text(flagged[cols['value']]),
+        'fields': ['value'],
+    },
+    {
+        'name': 'No Eligible Children',
+        'sheet': 'main',
+        'group': 'household',
+        'each_column': lambda col: 'eligible' in col.lower() and 'child' in col.lower(),
+        'predicate': lambda frame, cols: minutes(frame[cols['value']]) == 0,
+        'description': 'Household has 0 eligible children',
+    },
+    {
+        # Q94 (child swallowed AZM) AND child age >59 months
+        'name': 'Q94 Yes & Child Age >59 months',
+        'sheet': 'child_infoo',
+        'group': 'child',
+        'columns': {'age': 'child_age', 'q94': 'q94'},
+        'predicate': lambda frame, cols: (minutes(frame[cols['age']]) > 59) & is_yes(frame[cols['q94']]),
+        'description': lambda flagged, cols: ('Child ' + child_text(flagged, 'child_idd') + ' aged ' +
+                                              as_text(flagged[cols['age']]) + ' months (>59) swallowed AZM (unique_code2: ' +
+                                              child_text(flagged, 'unique_code2') + ')'),
+        'fields': ['age'],
+    },
+    {
+        # Q95 (swallowed in presence) AND Q102 = 0 minutes (NaN treated as 0)
+        'name': 'Q95 Yes & Q102 = 0 minutes',
+        'sheet': 'child_infoo',
+        'group': 'child',
+        'in_scope_only': True,
+        'columns': {'q95': 'q95', 'q102': PARENT_PREFIX + 'q102'},
+        'predicate': lambda frame, cols: is_yes(frame[cols['q95']]) & (
+            (minutes(frame[cols['q102']]) == 0) | minutes(frame[cols['q102']]).isna()
+        ),
+        'description': lambda flagged, cols: ('Child ' + child_text(flagged, 'child_idd') +
+                                              ' swallowed in presence but CDD time = 0 min (unique_code2: ' +
+                                              child_text(flagged, 'unique_code2') + ')'),
+    },
+    {
+        # Q95 (swallowed in presence) AND Q102 >= 100 minutes
+        'name': 'Q95 Yes & Q102 >= 100 minutes',
+        'sheet': 'child_infoo',
+        'group': 'child',
+        'in_scope_only': True,
+        'columns': {'q95': 'q95', 'q102': PARENT_PREFIX + 'q102'},
+        'predicate': lambda frame, cols: is_yes(frame[cols['q95']]) & (minutes(frame[cols['q102']]) >= 100),
+        'description': lambda flagged, cols: ('Child ' + child_text(flagged, 'child_idd') +
+                                              ' swallowed in presence but CDD time = ' +
+                                              as_text(minutes(flagged[cols['q102']])) +
+                                              ' min (>=100) (unique_code2: ' + child_text(flagged, 'unique_code2') + ')'),
+        'fields': ['q102'],
+    },
+    {
+        # Q86 = Yes AND Q90 = No (visited home but didn't offer child AZM)
+        'name': 'Q86 Yes & Q90 No',
+        'sheet': 'child_infoo',
+        'group': 'child',
+        'in_scope_only': True,
+        'columns': {'q86': PARENT_PREFIX + 'q86', 'q90': 'q90'},
+        'predicate': lambda frame, cols: (
+            is_yes(frame[cols['q86']]) & frame[cols['q90']].astype(str).str.contains('no', case=False, na=False)
+        ),
+        'description': lambda flagged, cols: ('Home visited (Q86=Yes) but child ' + child_text(flagged, 'child_idd') +
+                                              ' not offered AZM (Q90=No) (unique_code2: ' +
+                                              child_text(flagged, 'unique_code2') + ')'),
+    },
+    {
+        # Q102 = 0 AND Q94 = Yes (CDD spent 0 minutes but child swallowed AZM)
+        'name': 'Q102 = 0 & Q94 Yes',
+        'sheet': 'child_infoo',
+        'group': 'child',
+        'in_scope_only': True,
+        'columns': {'q102': PARENT_PREFIX + 'q102', 'q94': 'q94'},
+        'predicate': lambda frame, cols: is_yes(frame[cols['q94']]) & (
+            (minutes(frame[cols['q102']]) == 0) | minutes(frame[cols['q102']]).isna()
+        ),
+        'description': lambda flagged, cols: ('CDD spent 0 minutes (Q102=0) but child ' + child_text(flagged, 'child_idd') +
+                                              ' swallowed AZM (Q94=Yes) (unique_code2: ' +
+                                              child_text(flagged, 'unique_code2') + ')'),
+    },
+    {
+        # Duplicate unique_code, excluding "Not Approved" records
+        'name': DUPLICATE_ISSUE_TYPE,
+        'sheet': 'main',
+        'group': 'duplicate',
+        'columns': {'unique_code': 'unique_code'},
+        'optional': {'validation_status': 'validation_status'},
+        'predicate': duplicate_unique_codes,
+        'description': lambda flagged, cols: 'Duplicate unique_code: ' + as_text(flagged[cols['unique_code']]),
+        'fields': ['unique_code'],
+    },
+    {
+        # Urban settlement without basic amenities (batch check by enumerator),
+        # listed enumerator by enumerator
+        'name': ENUMERATOR_PATTERN_ISSUE_TYPE,
+        'sheet': 'main',
+        'group': 'enumerator_pattern',
+        'columns': {'settlement': 'settlement', 'enumerator': 'qc_enumerator'},
+        'column_lists': {'amenities': AMENITY_COLUMNS},
+        'sort_by': 'enumerator',
+        'id_columns': {'enumerator': 'enumerator'},
+        'predicate': urban_no_amenities,
+        'description': lambda flagged, cols: ('Enumerator "' + flagged[cols['enumerator']].astype(str) + '" - ALL ' +
+                                              flagged[cols['enumerator']].map(
+                                                  flagged[cols['enumerator']].value_counts()
+                                              ).astype(str) + ' urban records have NO amenities'),
+        'fields': ['enumerator'],
+    },
+]
+
+# Issue types in the order perform_qc_checks emits them
+QC_ISSUE_TYPE_ORDER = [rule['name'] for rule in QC_RULES]
+CHILD_ISSUE_TYPES = [rule['name'] for rule in QC_RULES if rule['sheet'] == 'child_infoo']
+
+
+def resolve_rule_columns(rule, frame):
+    """
+    Column bindings for one rule on frame: a list with one dict of role -> column
+    per run of the rule (several for each_column rules), empty when a required
+    column is missing.
+    """
+    schema = schema_of(frame)
+    cols = {}
+    for role, field in rule.get('columns', {}).items():
+        cols[role] = schema[field]
+        if cols[role] is None:
+            return []
+    for role, field in rule.get('optional', {}).items():
+        cols[role] = schema[field]
+    for role, names in rule.get('column_lists', {}).items():
+        cols[role] = [col for col in names if col in frame.columns]
+        if not cols[role]:
+            return []
+    if 'each_column' in rule:
+        return [dict(cols, value=col) for col in frame.columns if rule['each_column'](col)]
+    return [cols]
+
+
+def qc_rule_enabled(rule, checks, disabled_rules):
+    return rule['group'] in checks and rule['name'] not in disabled_rules
+
+
+def run_qc_rule(rule, scope):
+    """
+    Issue frames flagged by one rule, plus its stats entry. scope holds the
+    frames and id columns shared by every rule of a perform_qc_checks run and is
+    only read, so rules can run concurrently.
+    """
+    start = time.perf_counter()
+    stats = {'Rule': rule['name'], 'Sheet': rule['sheet'], 'Status': 'ran', 'Flagged': 0}
+    
+    frame = scope['df'] if rule['sheet'] == 'main' else scope['linked']
+    bindings = resolve_rule_columns(rule, frame) if frame is not None else []
+    if not bindings:
+        stats['Status'] = 'missing columns' if frame is not None else 'no child data'
+    
+    issue_frames = []
+    for cols in bindings:
+        mask = rule['predicate'](frame, cols)
+        if rule.get('sort_by'):
+            frame = frame[mask].sort_values(cols[rule['sort_by']], kind='mergesort')
+            mask = pd.Series(True, index=frame.index)
+        description = rule['description']
+        if callable(description):
+            description = lambda flagged, cols=cols, rule=rule: rule['description'](flagged, cols)
+        fields = [cols[role] for role in rule.get('fields', ())]
+        
+        if rule['sheet'] == 'main':
+            rule_id_cols = dict(scope['id_cols'], **{role: cols[bound] for role, bound in rule.get('id_columns', {}).items()})
+            frame_issues = build_issue_frame(frame, mask, rule['name'], description, rule_id_cols, fields=fields)
+        else:
+            in_scope = scope['in_scope']
+            if rule.get('in_scope_only'):
+                mask = in_scope & mask
+            frame_issues = build_issue_frame(frame, mask, rule['name'], description, scope['child_id_cols'],
+                                             fields=scope['child_fields'] + fields, hh_rows=frame['_parent_row'])
+            out_of_scope = ~in_scope[frame_issues.index].to_numpy()
+            if out_of_scope.any():
+                parent_fields = ['LGA', 'Ward', 'Community', 'Unique HH ID', 'Enumerator', 'Validation Status']
+                frame_issues[parent_fields] = frame_issues[parent_fields].astype(object)
+                frame_issues.loc[out_of_scope, parent_fields] = 'N/A'
+        
+        issue_frames.append(frame_issues)
+        stats['Flagged'] += len(frame_issues)
+    
+    stats['Seconds'] = time.perf_counter() - start
+    return issue_frames, stats
+
+
+# ---------------- QC WORKER PROCESSES ----------------
+# Most rules are pandas string work that holds the GIL, so parallel runs use
+# processes. perform_qc_checks writes the columns the rules read to Arrow IPC
+# files that the workers memory-map instead of receiving the frames pickled.
+# The pool is process-wide and started on first use.
+QC_POOL = {'lock': threading.Lock(), 'executor': None, 'workers': 0}
+
+
+def qc_process_pool(workers):
+    """The shared pool of QC worker processes, (re)started with the given size"""
+    with QC_POOL['lock']:
+        if QC_POOL['executor'] is None or QC_POOL['workers'] != workers:
+            if QC_POOL['executor'] is not None:
+                QC_POOL['executor'].shutdown(wait=False)
+            # spawn: forking a process that runs threads (Streamlit) can deadlock the child
+            QC_POOL['executor'] = ProcessPoolExecutor(max_workers=workers,
+                                                      mp_context=multiprocessing.get_context('spawn'))
+            QC_POOL['workers'] = workers
+        return QC_POOL['executor']
+
+
+def discard_qc_process_pool():
+    with QC_POOL['lock']:
+        if QC_POOL['executor'] is not None:
+            QC_POOL['executor'].shutdown(wait=False, cancel_futures=True)
+        QC_POOL['executor'] = None
+        QC_POOL['workers'] = 0
+
+
+def qc_rule_columns(rules, frame):
+    """Columns of frame bound by any of the rules (see resolve_rule_columns)"""
+    columns = set()
+    for rule in rules:
+        for cols in resolve_rule_columns(rule, frame):
+            for col in cols.values():
+                columns.update(col if isinstance(col, list) else [col])
+    columns.discard(None)
+    return columns
+
+
+def share_frame(frame, columns, path):
+    """
+    Write the given columns of frame (kept in frame order, index included) to an
+    Arrow IPC file for the QC workers. Object columns Arrow cannot hold as-is
+    (mixed numbers and text) are returned to be sent pickled instead.
+    Returns (path, column order, pickled frame or None).
+    """
+    frame = frame[[col for col in frame.columns if col in columns]]
+    pickled = None
+    try:
+        table = pa.Table.from_pandas(frame, preserve_index=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        mixed = []
+        for col in frame.columns[frame.dtypes == object]:
+            try:
+                pa.array(frame[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                mixed.append(col)
+        pickled = frame[mixed]
+        table = pa.Table.from_pandas(frame.drop(columns=mixed), preserve_index=True)
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return path, list(frame.columns), pickled
+
+
+def read_shared_frame(shared):
+    """A frame written by share_frame, memory-mapped"""
+    path, columns, pickled = shared
+    with pa.memory_map(path) as source:
+        frame = pa.ipc.open_file(source).read_all().to_pandas(split_blocks=True, self_destruct=True)
+    if pickled is not None:
+        for col in pickled.columns:
+            frame[col] = pickled[col].to_numpy()
+    return frame[columns]
+
+
+def run_qc_rules_in_worker(shared_scope, rule_names):
+    """
+    Worker process entry point: run the named rules on the frames perform_qc_checks
+    shared and return their run_qc_rule results in the same order.
+    """
+    scope = dict(shared_scope, df=read_shared_frame(shared_scope['df']), linked=None)
+    if shared_scope['linked'] is not None:
+        scope['linked'] = read_shared_frame(shared_scope['linked'])
+        scope['in_scope'] = scope['linked']['_parent_row'].isin(scope['df'].index)
+    rules = {rule['name']: rule for rule in QC_RULES}
+    return [run_qc_rule(rules[name], scope) for name in rule_names]
+
+
+def run_qc_rules_in_processes(rules, scope, workers):
+    """
+    run_qc_rule results for rules, spread round-robin over worker processes that
+    read the frames from shared Arrow files. Returns None when the pool failed,
+    so the caller can run the rules itself.
+    """
+    share_dir = tempfile.mkdtemp(prefix='kobo_qc_')
+    try:
+        df_columns = qc_rule_columns([rule for rule in rules if rule['sheet'] == 'main'], scope['df'])
+        df_columns.update(col for col in scope['id_cols'].values() if col)
+        shared_scope = {key: value for key, value in scope.items() if key not in ('df', 'linked', 'in_scope')}
+        shared_scope['df'] = share_frame(scope['df'], df_columns, os.path.join(share_dir, 'main.arrow'))
+        shared_scope['linked'] = None
+        if scope['linked'] is not None:
+            linked_columns = qc_rule_columns([rule for rule in rules if rule['sheet'] == 'child_infoo'], scope['linked'])
+            linked_columns.update(col for col in scope['child_id_cols'].values() if col)
+            linked_columns.update(scope['child_fields'] + ['_parent_row'])
+            shared_scope['linked'] = share_frame(scope['linked'], linked_columns,
+                                                 os.path.join(share_dir, 'linked.arrow'))
+        
+        chunks = [rules[offset::workers] for offset in range(min(workers, len(rules)))]
+        pool = qc_process_pool(workers)
+        futures = [pool.submit(run_qc_rules_in_worker, shared_scope, [rule['name'] for rule in chunk])
+                   for chunk in chunks]
+        results = {}
+        for chunk, future in zip(chunks, futures):
+            results.update(zip([rule['name'] for rule in chunk], future.result()))
+        return [results[rule['name']] for rule in rules]
+    except BrokenProcessPool:
+        discard_qc_process_pool()
+        return None
+    finally:
+        shutil.rmtree(share_dir, ignore_errors=True)
+
+
+def perform_qc_checks(df, child_df=None, linked_children=None, checks=QC_CHECK_GROUPS,
+                      disabled_rules=None, rule_stats=None, workers=None):
     """
     Perform comprehensive quality control checks on the dataset
     Returns a DataFrame with flagged issues by LGA, Ward, and Community
+    linked_children is an optional prebuilt link_child_records result
+    checks limits the run to some of QC_CHECK_GROUPS; rules named in disabled_rules
+    (default QC_DISABLED_RULES) are skipped. When rule_stats is a list, one entry
+    per rule with its status, wall time and flagged count is appended to it.
+    With workers > 1 (default QC_WORKERS) rules run in worker processes (see
+    run_qc_rules_in_processes); results are merged in registry order, as in a
+    serial run.
     """
-    qc_issues = []
-    
     if df.empty:
-        return pd.DataFrame(qc_issues)
-    
-    # Find column names flexibly
-    lga_col = find_column(df, ['lgas', 'lga', 'Q2. Local Government Area', 'LGA'])
-    ward_col = find_column(df, ['wards', 'ward', 'Q3.Ward', 'Q3. Ward', 'Ward'])
-    community_col = find_column(df, ['Community Name', 'Q4. Community Name', 'community'])
-    uuid_col = find_column(df, ['_uuid', 'uuid'])
-    unique_code_col = find_column(df, ['unique_code', 'unique_code_1', 'household_code'])
-    validation_status_col = find_column(df, ['_validation_status', 'validation_status', 'Validation Status'])
-    enumerator_col = find_column(df, ['Type in your Name', 'username', 'Enumerator', 'enumerator_name', 'enumerator'])
-    
-    # Create lookup dictionary for child records to get parent HH info
-    parent_lookup = {}
-    if uuid_col:
-        for idx, row in df.iterrows():
-            parent_lookup[row[uuid_col]] = {
-                'LGA': row.get(lga_col, 'N/A') if lga_col else 'N/A',
-                'Ward': row.get(ward_col, 'N/A') if ward_col else 'N/A',
-                'Community': row.get(community_col, 'N/A') if community_col else 'N/A',
-                'Unique HH ID': row.get(unique_code_col, 'N/A') if unique_code_col else 'N/A',
-                'Validation Status': row.get(validation_status_col, 'N/A') if validation_status_col else 'N/A',
-                'Enumerator': row.get(enumerator_col, 'N/A') if enumerator_col else 'N/A'
-            }
-    
-    # QC Check 1: Q22 > Q13 (Years living > Age of HH Head)
-    q22_col = find_column(df, ['Q22. How long have you been living continuously in ${community_confirm}', 
-                                'Q22', 'years_living', 'residence_duration'])
-    q13_col = find_column(df, [
-        'Q13. Age of Head of the Household',
-        'Q13',
-        'hh_head_age',
-        'age_head'
-    ])
-    
-    if q22_col and q13_col:
-        age_issue = df[pd.to_numeric(df[q22_col], errors='coerce') > pd.to_numeric(df[q13_col], errors='coerce')]
-        for idx, row in age_issue.iterrows():
-            qc_issues.append({
-                'LGA': row.get(lga_col, 'N/A') if lga_col else 'N/A',
-                'Ward': row.get(ward_col, 'N/A') if ward_col else 'N/A',
-                'Community': row.get(community_col, 'N/A') if community_col else 'N/A',
-                'Unique HH ID': row.get(unique_code_col, 'N/A') if unique_code_col else 'N/A',
-                'Enumerator': row.get(enumerator_col, 'N/A') if enumerator_col else 'N/A',
-                'Validation Status': row.get(validation_status_col, 'N/A') if validation_status_col else 'N/A',
-                'Issue Type': 'Age Inconsistencies',
-                'Description': f'Years of Living ({row.get(q22_col, "N/A")}) > HH Head Age ({row.get(q13_col, "N/A")})',
-                'Row Index': idx
-            })
-    
-    # QC Check 2: Education vs Occupation mismatch
-    education_col = find_column(df, ['Q20. Highest education level completed', 'Q20', 'education', 'education_level'])
-    occupation_col = find_column(df, ['Occupation', 'occupation', 'Q21. Occupation'])
-    
-    if education_col and occupation_col:
-        edu_occ_issue = df[
-            (df[education_col].astype(str).str.contains('No Formal Education', case=False, na=False)) &
-            (df[occupation_col].astype(str).str.contains('Professional|technical|managerial', case=False, na=False))
-        ]
-        for idx, row in edu_occ_issue.iterrows():
-            qc_issues.append({
-                'LGA': row.get(lga_col, 'N/A') if lga_col else 'N/A',
-                'Ward': row.get(ward_col, 'N/A') if ward_col else 'N/A',
-                'Community': row.get(community_col, 'N/A') if community_col else 'N/A',
-                'Unique HH ID': row.get(unique_code_col, 'N/A') if unique_code_col else 'N/A',
-                'Enumerator': row.get(enumerator_col, 'N/A') if enumerator_col else 'N/A',
-                'Validation Status': row.get(validation_status_col, 'N/A') if validation_status_col else 'N/A',
-                'Issue Type': 'Education-Occupation Mismatch',
-                'Description': 'No formal education but professional occupation',
-                'Row Index': idx
-            })
+        return pd.DataFrame(columns=QC_ISSUE_COLUMNS)
+    if disabled_rules is None:
+        disabled_rules = QC_DISABLED_RULES
+    if workers is None:
+        workers = QC_WORKERS
+    
+    schema = schema_of(df)
+    scope = {'df': df, 'linked': None, 'id_cols': {role: schema[field] for role, field in QC_ID_FIELDS.items()}}
+    
+    # Every child row carries its parent household's columns from one hash join
+    rules = [rule for rule in QC_RULES if qc_rule_enabled(rule, checks, disabled_rules)]
+    if child_df is not None and not child_df.empty and any(rule['sheet'] == 'child_infoo' for rule in rules):
+        linked = linked_children if linked_children is not None else link_child_records(df, child_df)
+        scope['linked'] = linked
+        # Children whose household is outside df keep N/A household details
+        scope['in_scope'] = linked['_parent_row'].isin(df.index)
+        scope['child_id_cols'] = {role: PARENT_PREFIX + field if PARENT_PREFIX + field in linked.columns else None
+                                  for role, field in QC_ID_FIELDS.items()}
+        scope['child_fields'] = [col for col in ['child_idd', 'unique_code2'] if col in linked.columns]
+    
+    results = None
+    if workers > 1 and len(rules) > 1:
+        results = run_qc_rules_in_processes(rules, scope, workers)
+    if results is None:
+        results = [run_qc_rule(rule, scope) for rule in rules]
+    results = dict(zip([rule['name'] for rule in rules], results))
+    
+    issue_frames = []
+    for rule in QC_RULES:
+        if rule['name'] in results:
+            frames, stats = results[rule['name']]
+            issue_frames.extend(frames)
+        elif rule['name'] in disabled_rules:
+            stats = {'Rule': rule['name'], 'Sheet': rule['sheet'], 'Status': 'disabled', 'Flagged': 0, 'Seconds': 0.0}
+        else:
+            continue
+        if rule_stats is not None:
+            rule_stats.append(stats)
     
-    # QC Check 3: Negative total children in household
-    children_cols = [col for col in df.columns if 'child' in col.lower() and 'total' in col.lower()]
-    for child_col in children_cols:
-        negative_children = df[pd.to_numeric(df[child_col], errors='coerce') < 0]
-        for idx, row in negative_children.iterrows():
-            qc_issues.append({
-                'LGA': row.get(lga_col, 'N/A') if lga_col else 'N/A',
-                'Ward': row.get(ward_col, 'N/A') if ward_col else 'N/A',
-                'Community': row.get(community_col, 'N/A') if community_col else 'N/A',
-                'Unique HH ID': row.get(unique_code_col, 'N/A') if unique_code_col else 'N/A',
-                'Enumerator': row.get(enumerator_col, 'N/A') if enumerator_col else 'N/A',
-                'Validation Status': row.get(validation_status_col, 'N/A') if validation_status_col else 'N/A',
-                'Issue Type': 'Negative Children Count',
-                'Description': f'Negative value in {child_col}: {row.get(child_col, "N/A")}',
-                'Row Index': idx
-            })
+    # Convert to DataFrame
+    qc_df = combine_issue_frames(issue_frames)
     
-    # QC Check 4: Households without eligible children
-    eligible_child_cols = [col for col in df.columns if 'eligible' in col.lower() and 'child' in col.lower()]
-    for elig_col in eligible_child_cols:
-        no_eligible = df[pd.to_numeric(df[elig_col], errors='coerce') == 0]
-        for idx, row in no_eligible.iterrows():
-            qc_issues.append({
-                'LGA': row.get(lga_col, 'N/A') if lga_col else 'N/A',
-                'Ward': row.get(ward_col, 'N/A') if ward_col else 'N/A',
-                'Community': row.get(community_col, 'N/A') if community_col else 'N/A',
-                'Unique HH ID': row.get(unique_code_col, 'N/A') if unique_code_col else 'N/A',
-                'Enumerator': row.get(enumerator_col, 'N/A') if enumerator_col else 'N/A',
-                'Validation Status': row.get(validation_status_col, 'N/A') if validation_status_col else 'N/A',
-                'Issue Type': 'No Eligible Children',
-                'Description': 'Household has 0 eligible children',
-                'Row Index': idx
-            })
+    # Format display text
+    if not qc_df.empty:
+        qc_df['LGA'] = title_case(qc_df['LGA'])
+        qc_df['Ward'] = title_case(qc_df['Ward'])
     
-    # QC Check 5: Check child_infoo sheet if provided (children 1-59 months)
-    if child_df is not None and not child_df.empty:
-        # Find child sheet columns - updated for new backend structure
-        age_col = find_column(child_df, [
-            'Q88. Child name and age ${child_idd} as at when MDA was done (6th to 11th December 2025)',
-            'Q88. Child name and age ${child_idd} as at when MDA was done (19th to 25th July 2025)',
-            'age_months',
-            'child_age'
-        ])
-        q94_col = find_column(child_df, [
-            'Q94. Did child ${child_idd} swallow the AZM offered?',
-            'Q94',
-            'child_swallow_azm'
-        ])
-        q95_col = find_column(child_df, [
-            'Q95. Did child ${child_idd} swallow the AZM in the presence of the person who offered it?',
-            'Q95',
-            'swallow_in_presence'
-        ])
-        q102_col = find_column(df, [
-            'Q102. About how many minutes did the CDD spend in your household?',
-            'Q102',
-            'cdd_time_minutes',
-            'cdd_time'
-        ])
-        
-        # Debug: Print if columns are found (can be removed later)
-        # st.write(f"DEBUG - Q95 column found: {q95_col}")
-        # st.write(f"DEBUG - Q102 column found: {q102_col}")
-        
-        # Check Q94 (child swallowed AZM) AND child age >59 months
-        if age_col and q94_col:
-            swallowed_over_59 = child_df[
-                (pd.to_numeric(child_df[age_col], errors='coerce') > 59) &
-                (child_df[q94_col].astype(str).str.contains('Yes', case=False, na=False))
-            ]
-            for idx, row in swallowed_over_59.iterrows():
-                submission_uuid = row.get('_submission__uuid', 'N/A')
-                parent_info = parent_lookup.get(submission_uuid, {'LGA': 'N/A', 'Ward': 'N/A', 'Community': 'N/A'})
-                qc_issues.append({
-                    'LGA': parent_info['LGA'],
-                    'Ward': parent_info['Ward'],
-                    'Community': parent_info['Community'],
-                    'Unique HH ID': parent_info.get('Unique HH ID', 'N/A'),
-                    'Enumerator': parent_info.get('Enumerator', 'N/A'),
-                    'Validation Status': parent_info.get('Validation Status', 'N/A'),
-                    'Issue Type': 'Q94 Yes & Child Age >59 months',
-                    'Description': f'Child {row.get("child_idd", "N/A")} aged {row.get(age_col, "N/A")} months (>59) swallowed AZM (unique_code2: {row.get("unique_code2", "N/A")})',
-                    'Row Index': idx
-                })
-        
-        # Check Q95 (swallowed in presence) AND Q102 = 0 minutes
-        if q95_col and q102_col:
-            for idx_child, child_row in child_df.iterrows():
-                submission_uuid = child_row.get('_submission__uuid', 'N/A')
-                # Find matching parent record
-                if uuid_col and submission_uuid != 'N/A':
-                    parent_row = df[df[uuid_col] == submission_uuid]
-                    if not parent_row.empty:
-                        q102_val = pd.to_numeric(parent_row.iloc[0].get(q102_col, -1), errors='coerce')
-                        q95_val = str(child_row.get(q95_col, '')).strip()
-                        
-                        # Check if Q95 is Yes and Q102 is 0 (or NaN treated as 0)
-                        if 'yes' in q95_val.lower() and (q102_val == 0 or pd.isna(q102_val) or q102_val == 0.0):
-                            parent_info = parent_lookup.get(submission_uuid, {'LGA': 'N/A', 'Ward': 'N/A', 'Community': 'N/A'})
-                            qc_issues.append({
-                                'LGA': parent_info['LGA'],
-                                'Ward': parent_info['Ward'],
-                                'Community': parent_info['Community'],
-                                'Unique HH ID': parent_info.get('Unique HH ID', 'N/A'),
-                                'Enumerator': parent_info.get('Enumerator', 'N/A'),
-                                'Validation Status': parent_info.get('Validation Status', 'N/A'),
-                                'Issue Type': 'Q95 Yes & Q102 = 0 minutes',
-                                'Description': f'Child {child_row.get("child_idd", "N/A")} swallowed in presence but CDD time = 0 min (unique_code2: {child_row.get("unique_code2", "N/A")})',
-                                'Row Index': idx_child
-                            })
-        
-        # Check Q95 (swallowed in presence) AND Q102 >= 100 minutes
-        if q95_col and q102_col:
-            for idx_child, child_row in child_df.iterrows():
-                submission_uuid = child_row.get('_submission__uuid', 'N/A')
-                # Find matching parent record
-                if uuid_col and submission_uuid != 'N/A':
-                    parent_row = df[df[uuid_col] == submission_uuid]
-                    if not parent_row.empty:
-                        q102_val = pd.to_numeric(parent_row.iloc[0].get(q102_col, -1), errors='coerce')
-                        q95_val = str(child_row.get(q95_col, '')).strip()
-                        
-                        if 'yes' in q95_val.lower() and q102_val >= 100:
-                            parent_info = parent_lookup.get(submission_uuid, {'LGA': 'N/A', 'Ward': 'N/A', 'Community': 'N/A'})
-                            qc_issues.append({
-                                'LGA': parent_info['LGA'],
-                                'Ward': parent_info['Ward'],
-                                'Community': parent_info['Community'],
-                                'Unique HH ID': parent_info.get('Unique HH ID', 'N/A'),
-                                'Enumerator': parent_info.get('Enumerator', 'N/A'),
-                                'Validation Status': parent_info.get('Validation Status', 'N/A'),
-                                'Issue Type': 'Q95 Yes & Q102 >= 100 minutes',
-                                'Description': f'Child {child_row.get("child_idd", "N/A")} swallowed in presence but CDD time = {q102_val} min (>=100) (unique_code2: {child_row.get("unique_code2", "N/A")})',
-                                'Row Index': idx_child
-                            })
-        
-        # NEW QC Check: Q86 = Yes AND Q90 = No (Visited home but didn't offer child AZM)
-        q86_col = find_column(df, [
-            'Q86. Did someone visit your home between 6th December 2025 and 11th December 2025 to offer your child or children any drug from a bottle?',
-            'Q86. Did someone visit your home between 19th July 2025 and 25th July 2025 to offer your child or children any drug from a bottle?',
-            'Q86',
-            'home_visit',
-            'visited_home'
-        ])
-        q90_col = find_column(child_df, [
-            'Q90. Did someone offer child ${child_idd} azithromycin between 6th and 11th of December 2025?',
-            'Q90. Did someone offer child ${child_idd} azithromycin between 19th and 25th of July 2025?',
-            'Q90',
-            'offered_azm',
-            'offer_azithromycin'
-        ])
-        
-        if q86_col and q90_col:
-            for idx_child, child_row in child_df.iterrows():
-                submission_uuid = child_row.get('_submission__uuid', 'N/A')
-                # Find matching parent record
-                if uuid_col and submission_uuid != 'N/A':
-                    parent_row = df[df[uuid_col] == submission_uuid]
-                    if not parent_row.empty:
-                        q86_val = str(parent_row.iloc[0].get(q86_col, '')).strip()
-                        q90_val = str(child_row.get(q90_col, '')).strip()
-                        
-                        # Check if Q86 is Yes and Q90 is No
-                        if 'yes' in q86_val.lower() and 'no' in q90_val.lower():
-                            parent_info = parent_lookup.get(submission_uuid, {'LGA': 'N/A', 'Ward': 'N/A', 'Community': 'N/A'})
-                            qc_issues.append({
-                                'LGA': parent_info['LGA'],
-                                'Ward': parent_info['Ward'],
-                                'Community': parent_info['Community'],
-                                'Unique HH ID': parent_info.get('Unique HH ID', 'N/A'),
-                                'Enumerator': parent_info.get('Enumerator', 'N/A'),
-                                'Validation Status': parent_info.get('Validation Status', 'N/A'),
-                                'Issue Type': 'Q86 Yes & Q90 No',
-                                'Description': f'Home visited (Q86=Yes) but child {child_row.get("child_idd", "N/A")} not offered AZM (Q90=No) (unique_code2: {child_row.get("unique_code2", "N/A")})',
-                                'Row Index': idx_child
-                            })
-        
-        # NEW QC Check: Q102 = 0 AND Q94 = Yes (CDD spent 0 minutes but child swallowed AZM)
-        if q102_col and q94_col:
-            for idx_child, child_row in child_df.iterrows():
-                submission_uuid = child_row.get('_submission__uuid', 'N/A')
-                # Find matching parent record
-                if uuid_col and submission_uuid != 'N/A':
-                    parent_row = df[df[uuid_col] == submission_uuid]
-                    if not parent_row.empty:
-                        q102_val = pd.to_numeric(parent_row.iloc[0].get(q102_col, -1), errors='coerce')
-                        q94_val = str(child_row.get(q94_col, '')).strip()
-                        
-                        # Check if Q102 is 0 (or NaN) and Q94 is Yes
-                        if 'yes' in q94_val.lower() and (q102_val == 0 or pd.isna(q102_val) or q102_val == 0.0):
-                            parent_info = parent_lookup.get(submission_uuid, {'LGA': 'N/A', 'Ward': 'N/A', 'Community': 'N/A'})
-                            qc_issues.append({
-                                'LGA': parent_info['LGA'],
-                                'Ward': parent_info['Ward'],
-                                'Community': parent_info['Community'],
-                                'Unique HH ID': parent_info.get('Unique HH ID', 'N/A'),
-                                'Enumerator': parent_info.get('Enumerator', 'N/A'),
-                                'Validation Status': parent_info.get('Validation Status', 'N/A'),
-                                'Issue Type': 'Q102 = 0 & Q94 Yes',
-                                'Description': f'CDD spent 0 minutes (Q102=0) but child {child_row.get("child_idd", "N/A")} swallowed AZM (Q94=Yes) (unique_code2: {child_row.get("unique_code2", "N/A")})',
-                                'Row Index': idx_child
-                            })
-    
-    # QC Check 6: Duplicate unique_code (HH Duplicate)
-    # Exclude records with validation status "Not Approved" from duplicate checks
-    if unique_code_col:
-        # Filter out "Not Approved" records before checking for duplicates
-        df_for_dup_check = df.copy()
-        if validation_status_col:
-            df_for_dup_check = df_for_dup_check[
-                ~df_for_dup_check[validation_status_col].astype(str).str.contains('Not Approved', case=False, na=False)
-            ]
-        
-        duplicates = df_for_dup_check[df_for_dup_check.duplicated(subset=[unique_code_col], keep=False)]
-        for idx, row in duplicates.iterrows():
-            qc_issues.append({
-                'LGA': row.get(lga_col, 'N/A') if lga_col else 'N/A',
-                'Ward': row.get(ward_col, 'N/A') if ward_col else 'N/A',
-                'Community': row.get(community_col, 'N/A') if community_col else 'N/A',
-                'Unique HH ID': row.get(unique_code_col, 'N/A') if unique_code_col else 'N/A',
-                'Enumerator': row.get(enumerator_col, 'N/A') if enumerator_col else 'N/A',
-                'Validation Status': row.get(validation_status_col, 'N/A') if validation_status_col else 'N/A',
-                'Issue Type': 'HH Duplicate (unique_code)',
-                'Description': f'Duplicate unique_code: {row.get(unique_code_col, "N/A")}',
-                'Row Index': idx
-            })
+    return qc_df
+
+
+def summarize_rule_stats(rule_stats):
+    """Per-rule totals of the entries collected by perform_qc_checks"""
+    if not rule_stats:
+        return pd.DataFrame(columns=['Rule', 'Sheet', 'Status', 'Flagged', 'Seconds'])
+    stats = pd.DataFrame(rule_stats)
+    return stats.groupby('Rule', sort=False).agg(
+        Sheet=('Sheet', 'first'), Status=('Status', 'first'), Flagged=('Flagged', 'sum'), Seconds=('Seconds', 'sum')
+    ).reset_index()
+
+
+# ---------------- INCREMENTAL QC ----------------
+# The last QC result is persisted with a fingerprint per household so the next
+# data version only re-evaluates households that are new, changed or removed
+QC_STATE_FILE = 'qc_state.pkl'
+
+# Bump whenever a QC rule changes so persisted results are recomputed in full
+QC_RULES_VERSION = 1
+
+
+def qc_rules_signature():
+    """Identifies the rule set a persisted QC result was computed with"""
+    return [QC_RULES_VERSION, sorted(QC_DISABLED_RULES)]
+
+
+def qc_input_columns(df, child_df):
+    """The main and child_infoo columns the QC rules can read (sorted)"""
+    main_cols = set(schema_columns(df, list(QC_ID_FIELDS.values()) + PARENT_FIELDS))
+    for rule in QC_RULES:
+        if rule['sheet'] == 'main':
+            for cols in resolve_rule_columns(rule, df):
+                for col in cols.values():
+                    main_cols.update(col if isinstance(col, list) else [col])
+    child_cols = set()
+    if child_df is not None:
+        child_cols = set(schema_columns(child_df, CHILD_FIELDS))
+        child_cols.update(col for col in ['child_idd', 'unique_code2', '_submission__uuid'] if col in child_df.columns)
+    return sorted(col for col in main_cols if col), sorted(col for col in child_cols if col)
+
+
+def household_fingerprints(df, child_df):
+    """
+    One row per household uuid: its main-sheet index label, a hash of the QC input
+    columns of its main row combined with its child_infoo rows, and the
+    unique_code and enumerator the group-level rules look at. Child rows without
+    a household get row -1. Returns None when households cannot be keyed
+    uniquely by uuid.
+    """
+    schema = schema_of(df)
+    uuid_col = schema['uuid']
+    if not uuid_col or not df.index.is_unique or df[uuid_col].isna().any() or df[uuid_col].duplicated().any():
+        return None
+    unique_code_col = schema['unique_code']
+    enumerator_col = schema['qc_enumerator']
+    
+    main_cols, child_cols = qc_input_columns(df, child_df)
+    uuids = pd.Index(df[uuid_col].astype(str))
+    fingerprints = pd.DataFrame({
+        'row': df.index,
+        'hash': pd.util.hash_pandas_object(df[main_cols], index=True).to_numpy(),
+        'unique_code': df[unique_code_col].to_numpy(dtype=object) if unique_code_col else None,
+        'enumerator': df[enumerator_col].to_numpy(dtype=object) if enumerator_col else None,
+    }, index=uuids)
+    
+    if child_df is not None and not child_df.empty and '_submission__uuid' in child_df.columns:
+        child_hash = pd.util.hash_pandas_object(child_df[child_cols], index=True)
+        per_household = child_hash.groupby(child_df['_submission__uuid'].astype(str)).sum()
+        fingerprints['hash'] ^= per_household.reindex(uuids, fill_value=0).to_numpy(dtype='uint64')
+        orphans = per_household[uuids.get_indexer(per_household.index) == -1]
+        if len(orphans):
+            fingerprints = pd.concat([fingerprints, pd.DataFrame(
+                {'row': -1, 'hash': orphans.to_numpy(), 'unique_code': None, 'enumerator': None},
+                index=orphans.index
+            )])
+    return fingerprints
+
+
+def read_qc_state(cache_dir):
+    """The persisted QC result, or None when missing, unreadable or from other rules"""
+    try:
+        state = pd.read_pickle(os.path.join(cache_dir, 'qc', QC_STATE_FILE))
+    except Exception:
+        return None
+    return state if state.get('rules_version') == qc_rules_signature() else None
+
+
+def write_qc_state(cache_dir, data_version, qc_df, fingerprints):
+    """Persist a QC result and its household fingerprints (file replaced atomically)"""
+    path = os.path.join(cache_dir, 'qc')
+    os.makedirs(path, exist_ok=True)
+    state = {'rules_version': qc_rules_signature(), 'data_version': data_version,
+             'qc': qc_df, 'fingerprints': fingerprints}
+    tmp_path = os.path.join(path, QC_STATE_FILE + '.tmp')
+    pd.to_pickle(state, tmp_path)
+    os.replace(tmp_path, os.path.join(path, QC_STATE_FILE))
+
+
+def order_qc_issues(qc_df, df, child_df):
+    """Sort merged issues into the order a full perform_qc_checks run produces"""
+    type_rank = qc_df['Issue Type'].map({issue: rank for rank, issue in enumerate(QC_ISSUE_TYPE_ORDER)})
+    is_child = qc_df['Issue Type'].isin(CHILD_ISSUE_TYPES).to_numpy()
+    position = qc_df['Row Index'].to_numpy()
+    # Index labels already sort like positions when the index is increasing
+    if not df.index.is_monotonic_increasing:
+        position = np.where(is_child, position, df.index.get_indexer(qc_df['Row Index']))
+    if child_df is not None and is_child.any() and not child_df.index.is_monotonic_increasing:
+        position = np.where(is_child, child_df.index.get_indexer(qc_df['Row Index']), position)
+    # The enumerator pattern issues are grouped by enumerator
+    enumerator = qc_df['Enumerator'].where(qc_df['Issue Type'] == ENUMERATOR_PATTERN_ISSUE_TYPE, '')
+    order = pd.DataFrame({'rank': type_rank, 'enumerator': enumerator.astype(str), 'position': position})
+    order = order.sort_values(['rank', 'enumerator', 'position'], kind='mergesort')
+    return qc_df.loc[order.index].reset_index(drop=True)
+
+
+def incremental_qc_checks(previous, df, child_df, fingerprints, rule_stats=None):
+    """
+    Update a previous QC result for a new data version. Household and child rules
+    run only for new or changed households; the duplicate and enumerator-pattern
+    rules are redone for the unique_codes and enumerators those households (and
+    removed ones) had before or have now. Returns None when a full run is needed.
+    """
+    previous_fp = previous['fingerprints']
+    if previous_fp is None or not previous_fp.index.is_unique:
+        return None
     
-    # QC Check 7: Urban settlement without basic amenities (batch check by enumerator)
-    settlement_col = find_column(df, ['Q5. Type of Settlement', 'Q5', 'settlement_type', 'settlement'])
-    enumerator_col = find_column(df, ['username', 'Type in your Name', 'Enumerator', 'enumerator_name'])
-    amenity_cols = ['Q23. Electricity', 'Q24. Radio', 'Q25. Television', 'Q26. A non-mobile telephone',
-                    'Q27. Computer', 'Q28. Refrigerator', 'Q29. Chair', 'Q30. Bed', 'Q31. Sofa',
-                    'Q32. Cupboard', 'Q33. Animal-drawn cart (donkey, horse, camel)', 'Q34. Bicycle',
-                    'Q35. Motorcycle or motor scooter', 'Q36. Car or truck', 'Q37. Boat with motor',
-                    'Q38. Canoe', 'Q39. Keke Napep', 'Q40. Fan', 'Q41. Watch', 'Q42. Mobile telephone',
-                    'Q43. Table', 'Q44. Electric Iron', 'Q45. Bank account', 'Q46. Air condition', 'Q47. Generator']
-    
-    if settlement_col and enumerator_col:
-        # Get existing amenity columns
-        existing_amenities = [col for col in amenity_cols if col in df.columns]
-        
-        if existing_amenities:
-            # Filter urban households only
-            urban_df = df[df[settlement_col].astype(str).str.contains('Urban', case=False, na=False)].copy()
-            
-            if not urban_df.empty:
-                # Group by enumerator
-                for enumerator, group in urban_df.groupby(enumerator_col):
-                    if len(group) >= 1:  # At least 1 record
-                        # Check if ALL records by this enumerator have ALL amenities as "No"
-                        all_records_no_amenities = True
-                        
-                        for idx, row in group.iterrows():
-                            # Check if this row has all amenities as "No"
-                            row_all_no = True
-                            for amenity in existing_amenities:
-                                val = str(row.get(amenity, '')).strip().lower()
-                                if val not in ['no', '']:
-                                    row_all_no = False
-                                    break
-                            
-                            # If even one row has some amenities, the enumerator is OK
-                            if not row_all_no:
-                                all_records_no_amenities = False
-                                break
-                        
-                        # Flag if ALL records by this enumerator have no amenities
-                        if all_records_no_amenities:
-                            # Flag all records from this enumerator
-                            for idx, row in group.iterrows():
-                                qc_issues.append({
-                                    'LGA': row.get(lga_col, 'N/A') if lga_col else 'N/A',
-                                    'Ward': row.get(ward_col, 'N/A') if ward_col else 'N/A',
-                                    'Community': row.get(community_col, 'N/A') if community_col else 'N/A',
-                                    'Unique HH ID': row.get(unique_code_col, 'N/A') if unique_code_col else 'N/A',
-                                    'Enumerator': row.get(enumerator_col, 'N/A') if enumerator_col else 'N/A',
-                                    'Validation Status': row.get(validation_status_col, 'N/A') if validation_status_col else 'N/A',
-                                    'Issue Type': 'Urban HH No Amenities (Enumerator Pattern)',
-                                    'Description': f'Enumerator "{enumerator}" - ALL {len(group)} urban records have NO amenities',
-                                    'Row Index': idx
-                                })
+    common = fingerprints.index.intersection(previous_fp.index)
+    same = fingerprints.loc[common, 'hash'].to_numpy() == previous_fp.loc[common, 'hash'].to_numpy()
+    unchanged = common[same]
+    current = fingerprints.drop(unchanged)
+    stale = previous_fp.drop(unchanged)
+    if current.empty and stale.empty:
+        return previous['qc']
+    if len(current) > len(fingerprints) // 2:
+        # Most households changed: a full run is cheaper
+        return None
     
-    # Convert to DataFrame
-    qc_df = pd.DataFrame(qc_issues)
+    households = current[current['row'] != -1]
+    orphans_changed = (current['row'] == -1).any() or (stale['row'] == -1).any()
+    if orphans_changed and households.empty:
+        return None
     
-    # Format display text
-    if not qc_df.empty and 'LGA' in qc_df.columns:
-        qc_df['LGA'] = qc_df['LGA'].apply(format_display_text)
-    if not qc_df.empty and 'Ward' in qc_df.columns:
-        qc_df['Ward'] = qc_df['Ward'].apply(format_display_text)
+    affected_rows = pd.Index(households['row']).union(pd.Index(stale.loc[stale['row'] != -1, 'row']))
+    # Households without a unique_code are duplicates of each other, so they form one more group
+    codes = pd.concat([households['unique_code'], stale.loc[stale['row'] != -1, 'unique_code']])
+    affected_codes = pd.unique(codes.dropna())
+    missing_code_changed = codes.isna().any()
+    affected_enumerators = pd.unique(pd.concat([current['enumerator'], stale['enumerator']]).dropna())
+    
+    # Drop previous issues of every household, code and enumerator that is re-evaluated
+    qc_df = previous['qc']
+    group_level = qc_df['Issue Type'].isin([DUPLICATE_ISSUE_TYPE, ENUMERATOR_PATTERN_ISSUE_TYPE])
+    redo = ~group_level & qc_df['HH Row'].isin(affected_rows)
+    if orphans_changed:
+        redo |= ~group_level & (qc_df['HH Row'] == -1)
+    redo |= (qc_df['Issue Type'] == DUPLICATE_ISSUE_TYPE) & (
+        qc_df['Unique HH ID'].isin(affected_codes) | (missing_code_changed & qc_df['Unique HH ID'].isna())
+    )
+    redo |= (qc_df['Issue Type'] == ENUMERATOR_PATTERN_ISSUE_TYPE) & qc_df['Enumerator'].isin(affected_enumerators)
+    frames = [qc_df[~redo]]
+    
+    # Row-local rules for the changed households and their (or orphaned) children
+    changed_children = None
+    if child_df is not None and not child_df.empty and '_submission__uuid' in child_df.columns:
+        child_uuids = child_df['_submission__uuid'].astype(str)
+        changed = child_uuids.isin(households.index)
+        if orphans_changed:
+            changed |= child_uuids.isin(fingerprints.index[fingerprints['row'] == -1])
+        changed_children = child_df[changed]
+    frames.append(perform_qc_checks(df.loc[households['row']], child_df=changed_children,
+                                    checks=('household', 'child'), rule_stats=rule_stats))
+    
+    # Group-level rules over every household sharing an affected code or enumerator
+    unique_code_col = field_column(df, 'unique_code')
+    if unique_code_col and (len(affected_codes) or missing_code_changed):
+        in_group = df[unique_code_col].isin(affected_codes) | (missing_code_changed & df[unique_code_col].isna())
+        frames.append(perform_qc_checks(df[in_group], checks=('duplicate',), rule_stats=rule_stats))
+    enumerator_col = field_column(df, 'qc_enumerator')
+    if enumerator_col and len(affected_enumerators):
+        frames.append(perform_qc_checks(df[df[enumerator_col].isin(affected_enumerators)],
+                                        checks=('enumerator_pattern',), rule_stats=rule_stats))
+    
+    return order_qc_issues(combine_issue_frames(frames), df, child_df)
+
+
+@st.cache_resource(show_spinner="🔎 Running QC checks...", max_entries=4)
+def get_qc_results(data_version, _df, _child_df):
+    """
+    QC issues for the whole dataset, computed once per data version and kept for
+    the most recent versions. Shared across sessions, so treat as read-only.
+    A new version updates the persisted result incrementally when possible.
+    Returns (qc_df, per-rule timings of the run that produced it).
+    """
+    note_cache_miss('get_qc_results')
+    rule_stats = []
+    previous = read_qc_state(KOBO_CACHE_DIR)
+    if previous is not None and previous['data_version'] == data_version:
+        return previous['qc'], summarize_rule_stats(rule_stats)
+    
+    fingerprints = household_fingerprints(_df, _child_df)
+    qc_df = None
+    if previous is not None and fingerprints is not None:
+        qc_df = incremental_qc_checks(previous, _df, _child_df, fingerprints, rule_stats=rule_stats)
+    if qc_df is None:
+        rule_stats = []
+        qc_df = perform_qc_checks(_df, child_df=_child_df, rule_stats=rule_stats)
     
-    return qc_df
+    try:
+        write_qc_state(KOBO_CACHE_DIR, data_version, qc_df, fingerprints)
+    except Exception:
+        # Persisting only speeds up the next version; never fail the dashboard over it
+        pass
+    return qc_df, summarize_rule_stats(rule_stats)
+
+
+def slice_qc_results(qc_df, rows, include_unlinked=False):
+    """
+    Issues whose household is among the main-sheet index labels in rows. Child
+    issues without a household (HH Row -1) are kept only when include_unlinked.
+    """
+    keep = qc_df['HH Row'].isin(rows)
+    if include_unlinked:
+        keep |= qc_df['HH Row'] == -1
+    return qc_df[keep]
+
+
+# ---------------- QC ISSUES TABLE ----------------
+# The detailed issues table is served a page at a time: search and sort run
+# here over the cached issue set and only the current page reaches the browser
+QC_TABLE_COLUMNS = [col for col in QC_ISSUE_COLUMNS if col not in ('Row Index', 'HH Row')]
+QC_TABLE_PAGE_SIZES = [25, 50, 100, 250, 500]
+QC_TABLE_DEFAULT_PAGE_SIZE = 100
+QC_TABLE_DEFAULT_ORDER = 'Default order'
+
+
+def search_qc_issues(qc_df, query):
+    """Issues with query (plain text, case-insensitive) in any displayed column"""
+    query = query.strip()
+    if not query:
+        return qc_df
+    pattern = re.escape(query)
+    matched = np.zeros(len(qc_df), dtype=bool)
+    for col in QC_TABLE_COLUMNS:
+        if col in qc_df.columns:
+            matched |= text_contains(qc_df[col], pattern).to_numpy()
+    return qc_df[matched]
+
+
+def qc_page_count(rows, page_size):
+    return max(1, -(-rows // page_size))
+
+
+def qc_table_page(qc_df, page, page_size, sort_column=None, descending=False):
+    """
+    One page of the issues table (displayed columns only). Rows are sorted by
+    sort_column (stable, missing values last) or kept in rule order when None;
+    only the sort key is sorted and only the page's rows are gathered.
+    """
+    page = min(max(1, page), qc_page_count(len(qc_df), page_size))
+    start = (page - 1) * page_size
+    if sort_column is None:
+        positions = np.arange(start, min(start + page_size, len(qc_df)))
+    else:
+        keys = qc_df[sort_column].reset_index(drop=True)
+        if keys.dtype == object:
+            # IDs stored as text sort as numbers; mixed numbers and text would not compare
+            numeric = pd.to_numeric(keys, errors='coerce')
+            keys = numeric if numeric.notna().sum() == keys.notna().sum() else keys.astype(str).where(keys.notna())
+        order = keys.sort_values(ascending=not descending, kind='stable', na_position='last').index
+        positions = order[start:start + page_size]
+    columns = [col for col in QC_TABLE_COLUMNS if col in qc_df.columns]
+    return qc_df.iloc[positions][columns]
+
+
+def reset_qc_page():
+    """Back to the first page when the search or sort changes"""
+    st.session_state['qc_page'] = 1
+
+
+# ---------------- LGA PARTITIONS ----------------
+# LGA logins only ever see their own LGA, so they are served a partition of the
+# snapshot: the LGA's main rows, their child_infoo rows and their QC issues,
+# materialized once per data version and shared by that LGA's sessions
+
+def lga_key(value):
+    """Normalized LGA name matching logins to partitions (case and spaces ignored)"""
+    return str(value).strip().lower()
+
+
+def build_lga_partition(sheets_dict, lga):
+    """
+    Main rows whose LGA matches lga (see lga_key) and the child_infoo rows of
+    those households. Index labels are those of the full sheets.
+    """
+    df = sheets_dict['main']
+    lga_col = field_column(df, 'lga')
+    if lga_col is None:
+        main = df.iloc[:0]
+    else:
+        # Compare the distinct LGA values once instead of every row
+        codes, uniques = pd.factorize(df[lga_col])
+        matching = [code for code, value in enumerate(uniques) if lga_key(value) == lga_key(lga)]
+        main = df.iloc[np.flatnonzero(np.isin(codes, matching))]
+    
+    child_df = sheets_dict.get('child_infoo', pd.DataFrame())
+    uuid_col = field_column(df, 'uuid')
+    if child_df.empty or not uuid_col or '_submission__uuid' not in child_df.columns:
+        child_df = child_df.iloc[:0]
+    else:
+        households = pd.Index(main[uuid_col].dropna().astype(str).unique())
+        child_df = child_df[households.get_indexer(child_df['_submission__uuid'].astype(str)) >= 0]
+    return {'main': main, 'child_infoo': child_df}
+
+
+@st.cache_resource(show_spinner=False, max_entries=2 * len(LGA_CREDENTIALS))
+def get_lga_partition(data_version, lga, _sheets_dict):
+    """One LGA's partition, built once per data version. Shared across sessions, so treat as read-only."""
+    note_cache_miss('get_lga_partition')
+    return build_lga_partition(_sheets_dict, lga)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2 * len(LGA_CREDENTIALS))
+def get_lga_qc_results(data_version, lga, _sheets_dict):
+    """
+    QC issues of one LGA partition's households, sliced once per data version
+    from the survey-wide result (duplicates and enumerator patterns span LGAs).
+    Returns (qc_df, per-rule timings) like get_qc_results.
+    """
+    note_cache_miss('get_lga_qc_results')
+    qc_all, qc_rule_stats = get_qc_results(data_version, _sheets_dict['main'], _sheets_dict['child_infoo'])
+    partition = get_lga_partition(data_version, lga, _sheets_dict)
+    return slice_qc_results(qc_all, partition['main'].index), qc_rule_stats
 
 
 # ---------------- LOGIN FUNCTIONS ----------------
@@ -1303,9 +3158,66 @@ def login_page():
 
 
 # ---------------- MAIN DASHBOARD ----------------
-def run_dashboard():
-    """Main dashboard interface"""
+def render_trace_panel(trace, sheets_dict, qc_rule_stats):
+    """Admin panel: stage timings of this run, dataset load timings and QC rule timings, with JSON export"""
+    stages = trace_frame(trace)
+    st.write(f"**This run:** {trace['seconds']:.2f} s across {len(stages)} stages "
+             f"(data version `{sheets_dict.get('data_version')}`)")
+    st.dataframe(stages.round(3), hide_index=True, use_container_width=True)
+    st.checkbox("Track memory per stage (tracemalloc, slows the next runs)", key='trace_memory')
+    
+    load_timings = sheets_dict.get('load_timings') or {}
+    if load_timings:
+        # Download and parse happen in the background refresh, not in this run
+        st.write("**Dataset load timings (seconds):**")
+        st.dataframe(
+            pd.DataFrame({'Step': list(load_timings.keys()), 'Seconds': [round(s, 3) for s in load_timings.values()]}),
+            hide_index=True
+        )
+    sync_state = sheets_dict.get('sync_state')
+    if sync_state:
+        st.write(f"**Incremental sync:** {sync_state['delta_submissions']:,} new/changed submissions in the last pull")
+    lazy_sheets = [name for name in SHEET_NAMES if is_lazy_sheet(sheets_dict.get(name))]
+    if lazy_sheets:
+        st.write("**Lazy sheets:** " + ", ".join(
+            f"{name} ({'loaded' if sheets_dict[name]['frame'] is not None else 'not loaded'})" for name in lazy_sheets))
+    dropped_columns = sheets_dict.get('dropped_columns')
+    if dropped_columns:
+        st.write(f"**Column projection:** {sum(dropped_columns.values()):,} unused export columns not parsed ("
+                 + ", ".join(f"{name}: {count}" for name, count in dropped_columns.items()) + ")")
+    
+    if qc_rule_stats is not None:
+        if qc_rule_stats.empty:
+            st.write("**QC rules:** results for this data version were loaded from the persisted result.")
+        else:
+            st.write(f"**QC rules:** {qc_rule_stats['Seconds'].sum():.3f} s across {len(qc_rule_stats)} rules")
+            st.dataframe(qc_rule_stats.round({'Seconds': 4}), hide_index=True, use_container_width=True)
+    
+    st.download_button(
+        "📥 Export trace (JSON)",
+        data=trace_json(trace, data_version=sheets_dict.get('data_version'), load_timings=load_timings,
+                        sync_state=sync_state, qc_rule_stats=qc_rule_stats),
+        file_name=f"dashboard_trace_{pd.Timestamp(trace['started_at'], unit='s'):%Y%m%d_%H%M%S}.json",
+        mime="application/json"
+    )
     
+    main_df = sheets_dict['main']
+    st.write(f"**Main sheet columns ({len(main_df.columns)}):**")
+    st.code("\n".join(main_df.columns.tolist()))
+
+
+def run_dashboard():
+    """Main dashboard interface, traced per stage"""
+    trace = start_trace(track_memory=st.session_state.get('trace_memory', False))
+    try:
+        render_dashboard(trace)
+    finally:
+        # Also on st.rerun() and errors, so a memory trace never outlives its run
+        finish_trace(trace)
+
+
+def render_dashboard(trace):
+    """Dashboard page body; stages are recorded into trace"""
     # Enhanced Header
     st.markdown("""
     <div class="main-header">
@@ -1317,14 +3229,24 @@ def run_dashboard():
     </div>
     """, unsafe_allow_html=True)
     
-    # Load data first - now returns dictionary of sheets
-    sheets_dict = load_data_from_kobo()
-    
-    if sheets_dict and not sheets_dict['main'].empty:
-        sheets_dict = preprocess_data(sheets_dict)
-    
-    # Extract main sheet for compatibility with existing code
-    df = sheets_dict['main'] if sheets_dict else pd.DataFrame()
+    # Load data first - the preprocessed snapshot served to all sessions
+    with trace_stage(trace, 'Load dataset') as stage:
+        sheets_dict, fetched_at = load_sheets()
+        
+        # Extract main sheet for compatibility with existing code
+        df = sheets_dict['main'] if sheets_dict else pd.DataFrame()
+        child_infoo_df = sheets_dict.get('child_infoo', pd.DataFrame()) if sheets_dict else pd.DataFrame()
+        stage['Rows'] = len(df)
+    
+    # LGA logins work on their LGA's partition and never touch the other LGAs' rows
+    lga_scope = None
+    if st.session_state.get('access_level') == 'lga' and st.session_state.get('lga_filter') and not df.empty:
+        lga_scope = lga_key(st.session_state['lga_filter'])
+        with trace_stage(trace, 'LGA partition', cache='get_lga_partition') as stage:
+            partition = get_lga_partition(sheets_dict.get('data_version'), lga_scope, sheets_dict)
+            df = partition['main']
+            child_infoo_df = partition['child_infoo']
+            stage['Rows'] = len(df)
     
     # Sidebar with Filters
     with st.sidebar:
@@ -1371,8 +3293,15 @@ def run_dashboard():
             st.rerun()
         
         if st.button("🔄 Refresh Data", use_container_width=True):
-            st.cache_data.clear()
-            st.rerun()
+            # Only the Kobo dataset is refreshed; caches derived from it are keyed
+            # on the data version and rebuild when the new snapshot is swapped in
+            if request_dataset_refresh(get_dataset_holder()):
+                st.info("🔄 Refreshing data from KoboToolbox in the background. Rerun in a moment to see it.")
+            else:
+                st.info("⏳ Data was refreshed moments ago or a refresh is already running.")
+        
+        if fetched_at:
+            st.caption(f"🕒 Data snapshot updated {format_snapshot_age(fetched_at)}")
         
         st.markdown("<br>", unsafe_allow_html=True)
         
@@ -1387,72 +3316,67 @@ def run_dashboard():
         </div>
         """, unsafe_allow_html=True)
         
-        # Initialize filtered_df
-        filtered_df = df.copy() if df is not None and not df.empty else pd.DataFrame()
-        
-        # Find column names (including plural forms)
-        lga_col = find_column(filtered_df, ['lgas', 'lga', 'Q2. Local Government Area', 'LGA', 'Local Government Area', 'Lgas'])
-        ward_col = find_column(filtered_df, ['wards', 'ward', 'Q3.Ward', 'Q3. Ward', 'Ward', 'Wards'])
-        community_col = find_column(filtered_df, ['Community Name', 'Q4. Community Name', 'community', 'Community'])
-        status_col = find_column(filtered_df, ['_validation_status', 'validation_status', 'Validation Status'])
-        date_col = find_column(filtered_df, ['Q8. Date', '_submission_time', 'start', 'Date', 'date', 'submission_time'])
-        
-        # Apply LGA filter for non-admin users (case-insensitive comparison)
-        if st.session_state.get('access_level') == 'lga' and st.session_state.get('lga_filter') and lga_col:
-            # Case-insensitive filtering
+        # Filters select row ids through the prebuilt index; the frame is sliced once at the end
+        has_data = df is not None and not df.empty
+        with trace_stage(trace, 'Filter index', cache='get_filter_index') as stage:
+            filter_index = get_filter_index(sheets_dict.get('data_version'), lga_scope, df) if has_data else None
+            stage['Rows'] = len(df)
+        filters_stage = begin_stage(trace, 'Sidebar filters')
+        row_mask = np.ones(len(df), dtype=bool) if has_data else np.zeros(0, dtype=bool)
+        filter_cols = filter_index['columns'] if has_data else dict.fromkeys(FILTER_DIMENSIONS)
+        filter_state = {}
+        
+        # LGA users are already restricted to their LGA's partition
+        if lga_scope is not None:
             lga_filter_value = st.session_state['lga_filter']
-            
-            # Debug: Show what we're looking for
-            st.sidebar.info(f"🔍 Searching for LGA: **{lga_filter_value}**")
-            
-            # Show available LGAs in the dataset
-            available_lgas = df[lga_col].dropna().unique().tolist()
-            st.sidebar.info("📊 Available LGAs in dataset:\n" + "\n".join([f"- {lga}" for lga in sorted(available_lgas)]))
-            
-            # Perform case-insensitive filtering
-            filtered_df = filtered_df[filtered_df[lga_col].astype(str).str.lower() == lga_filter_value.lower()]
+            filter_state['lga'] = lga_filter_value
             
             # Show results
-            if filtered_df.empty:
+            if not row_mask.any():
                 st.sidebar.error(f"❌ No data found for LGA: **{lga_filter_value}**")
                 st.sidebar.warning("⚠️ Please ensure:\n1. Data has been uploaded\n2. LGA name matches exactly\n3. You're using the correct username")
             else:
-                st.sidebar.success(f"✅ Found {len(filtered_df)} records for **{lga_filter_value}**")
+                st.sidebar.success(f"✅ Found {int(row_mask.sum())} records for **{lga_filter_value}**")
         
         # LGA Filter (only for admin)
-        if st.session_state.get('access_level') == 'admin' and not filtered_df.empty and lga_col:
-            lga_options = ['All'] + sorted(filtered_df[lga_col].dropna().unique().tolist())
+        if st.session_state.get('access_level') == 'admin' and row_mask.any() and filter_cols['lga']:
+            lga_options = ['All'] + filter_options(filter_index, 'lga', row_mask)
             lga_filter = st.selectbox("📍 Filter by LGA", options=lga_options, key='sidebar_lga')
             if lga_filter != 'All':
-                filtered_df = filtered_df[filtered_df[lga_col] == lga_filter]
+                row_mask &= value_bitmap(filter_index, 'lga', lga_filter)
+                filter_state['lga'] = lga_filter
         
         # Ward Filter
-        if not filtered_df.empty and ward_col:
-            ward_options = ['All'] + sorted(filtered_df[ward_col].dropna().unique().tolist())
+        if row_mask.any() and filter_cols['ward']:
+            ward_options = ['All'] + filter_options(filter_index, 'ward', row_mask)
             ward_filter = st.selectbox("🏘️ Filter by Ward", options=ward_options, key='sidebar_ward')
             if ward_filter != 'All':
-                filtered_df = filtered_df[filtered_df[ward_col] == ward_filter]
+                row_mask &= value_bitmap(filter_index, 'ward', ward_filter)
+                filter_state['ward'] = ward_filter
         
         # Community Filter
-        if not filtered_df.empty and community_col:
-            community_options = ['All'] + sorted(filtered_df[community_col].dropna().unique().tolist())
+        if row_mask.any() and filter_cols['community']:
+            community_options = ['All'] + filter_options(filter_index, 'community', row_mask)
             community_filter = st.selectbox("🏠 Filter by Community", options=community_options, key='sidebar_community')
             if community_filter != 'All':
-                filtered_df = filtered_df[filtered_df[community_col] == community_filter]
+                row_mask &= value_bitmap(filter_index, 'community', community_filter)
+                filter_state['community'] = community_filter
         
         # Validation Status Filter
-        if not filtered_df.empty and status_col:
-            status_options = ['All'] + sorted(filtered_df[status_col].dropna().unique().tolist())
+        if row_mask.any() and filter_cols['status']:
+            status_options = ['All'] + filter_options(filter_index, 'status', row_mask)
             status_filter = st.selectbox("✅ Filter by Status", options=status_options, key='sidebar_status')
             if status_filter != 'All':
-                filtered_df = filtered_df[filtered_df[status_col] == status_filter]
+                row_mask &= value_bitmap(filter_index, 'status', status_filter)
+                filter_state['status'] = status_filter
         
         # Date Range Filter
-        if not filtered_df.empty and date_col:
-            date_series = pd.to_datetime(filtered_df[date_col], errors='coerce')
-            if date_series.notna().any():
-                min_date = date_series.min().date()
-                max_date = date_series.max().date()
+        if row_mask.any() and has_data and filter_index['date_col']:
+            days = filter_index['days'][row_mask]
+            days = days[~np.isnat(days)]
+            if len(days):
+                min_date = days.min().astype(object)
+                max_date = days.max().astype(object)
                 date_range = st.date_input(
                     "📅 Date Range",
                     value=(min_date, max_date),
@@ -1461,22 +3385,30 @@ def run_dashboard():
                     key='sidebar_date'
                 )
                 if len(date_range) == 2:
-                    mask = (date_series.dt.date >= date_range[0]) & (date_series.dt.date <= date_range[1])
-                    filtered_df = filtered_df[mask]
+                    all_days = filter_index['days']
+                    filter_state['date_range'] = tuple(date_range)
+                    row_mask &= ((all_days >= np.datetime64(date_range[0], 'D')) &
+                                 (all_days <= np.datetime64(date_range[1], 'D')))
+        
+        filtered_df = df.iloc[np.flatnonzero(row_mask)] if has_data else pd.DataFrame()
+        filters_stage['Rows'] = len(filtered_df)
+        end_stage(trace, filters_stage)
     
     # Main content - Check if data is available
     if df is None or df.empty:
         st.warning("⚠️ No data available. The dashboard will display once data is loaded from KoboToolbox.")
+        finish_trace(trace)
         return
     
-    # Debug: Show column names (remove this after debugging)
-    with st.expander("🔍 Debug: View Available Columns", expanded=False):
-        st.write(f"**Total columns:** {len(df.columns)}")
-        st.write("**Column names:**")
-        st.code("\n".join(df.columns.tolist()))
+    # Per-stage timings of this run (admin only), filled in once the page is rendered
+    trace_panel = None
+    if st.session_state.get('access_level') == 'admin':
+        trace_panel = st.expander("⏱️ Performance Trace", expanded=False)
     
     # Calculate metrics
-    metrics = calculate_metrics(filtered_df)
+    with trace_stage(trace, 'Metrics') as stage:
+        metrics = calculate_metrics(filtered_df)
+        stage['Rows'] = len(filtered_df)
     
     # Display metrics
     st.markdown('<div class="section-header">📈 Key Performance Indicators</div>', unsafe_allow_html=True)
@@ -1523,7 +3455,9 @@ def run_dashboard():
         """.format(metrics['rejected']), unsafe_allow_html=True)
     
     # Data Quality Alerts
-    issues = identify_data_quality_issues(filtered_df)
+    with trace_stage(trace, 'Data quality alerts') as stage:
+        issues = identify_data_quality_issues(filtered_df)
+        stage['Rows'] = len(filtered_df)
     if issues:
         st.markdown('<div class="section-header">⚠️ Data Quality Insights & Alerts</div>', unsafe_allow_html=True)
         for issue in issues:
@@ -1534,68 +3468,16 @@ def run_dashboard():
     # Data Explorer - Advanced Table with Planned vs Reached HH (MOVED FIRST)
     st.markdown('<div class="section-header">📋 Coverage Summary: Planned vs Reached Households</div>', unsafe_allow_html=True)
     
-    # Get community column
-    q4_col = find_column(filtered_df, ['Q4. Community Name', 'community', 'community_name'])
-    lga_col = find_column(filtered_df, ['Q2. Local Government Area', 'lga', 'LGA'])
-    ward_col = find_column(filtered_df, ['Q3.Ward', 'Q3. Ward', 'ward', 'Ward'])
-    validation_status_col = find_column(filtered_df, ['_validation_status', 'validation_status', 'Validation Status'])
-    
-    if q4_col and not filtered_df.empty:
-        # Filter out "Not Approved" records for the coverage table
-        coverage_df = filtered_df.copy()
-        if validation_status_col:
-            coverage_df = coverage_df[
-                ~coverage_df[validation_status_col].astype(str).str.contains('Not Approved', case=False, na=False)
-            ]
-        
-        # Group by LGA, Ward, Community and count households
-        explorer_data = []
-        
-        for lga in coverage_df[lga_col].unique() if lga_col else ['N/A']:
-            lga_df = coverage_df[coverage_df[lga_col] == lga] if lga_col else coverage_df
-            
-            for ward in lga_df[ward_col].unique() if ward_col else ['N/A']:
-                ward_df = lga_df[lga_df[ward_col] == ward] if ward_col else lga_df
-                
-                for community_code in ward_df[q4_col].unique():
-                    if pd.notna(community_code):
-                        # Get community name from mapping
-                        community_name = COMMUNITY_CODE_TO_NAME.get(str(community_code), str(community_code))
-                        
-                        # Get planned HH
-                        planned_hh = COMMUNITY_PLANNED_HH.get(str(community_code), 0)
-                        
-                        # Count reached HH (excluding "Not Approved")
-                        reached_hh = len(ward_df[ward_df[q4_col] == community_code])
-                        
-                        # Calculate percentage
-                        coverage_pct = (reached_hh / planned_hh * 100) if planned_hh > 0 else 0
-                        
-                        # Status
-                        if reached_hh >= planned_hh:
-                            status = "✅ Target Met"
-                            status_color = "green"
-                        elif reached_hh > 0:
-                            status = "⚠️ In Progress"
-                            status_color = "red"
-                        else:
-                            status = "❌ Not Started"
-                            status_color = "red"
-                        
-                        explorer_data.append({
-                            'LGA': lga,
-                            'Ward': ward,
-                            'Community': community_name,
-                            'Planned HH': planned_hh,
-                            'Reached HH': reached_hh,
-                            'Coverage %': round(coverage_pct, 1),
-                            'Status': status,
-                            'Status_Color': status_color
-                        })
-        
-        if explorer_data:
-            explorer_df = pd.DataFrame(explorer_data)
-            
+    # One grouped count per filter state, merged with the planned communities
+    explorer_df = None
+    if not filtered_df.empty:
+        with trace_stage(trace, 'Coverage summary', cache='get_coverage_summary') as stage:
+            explorer_df = get_coverage_summary(sheets_dict.get('data_version'), lga_scope,
+                                               tuple(sorted(filter_state.items())), filtered_df)
+            stage['Rows'] = len(filtered_df)
+    
+    if explorer_df is not None:
+        if not explorer_df.empty:
             # Summary metrics
             exp_col1, exp_col2, exp_col3, exp_col4 = st.columns(4)
             
@@ -1622,17 +3504,19 @@ def run_dashboard():
             display_explorer_df = explorer_df.drop(columns=['Status_Color'])
             
             # Apply styling using the original dataframe's Status_Color column
-            st.dataframe(
-                display_explorer_df.style.apply(
-                    lambda row: ['background-color: #d1fae5'] * len(row) 
-                    if explorer_df.loc[row.name, 'Status_Color'] == 'green' 
-                    else ['background-color: #fee2e2'] * len(row), 
-                    axis=1
-                ),
-                use_container_width=True,
-                height=500,
-                hide_index=True
-            )
+            with trace_stage(trace, 'Coverage table render') as stage:
+                st.dataframe(
+                    display_explorer_df.style.apply(
+                        lambda row: ['background-color: #d1fae5'] * len(row) 
+                        if explorer_df.loc[row.name, 'Status_Color'] == 'green' 
+                        else ['background-color: #fee2e2'] * len(row), 
+                        axis=1
+                    ),
+                    use_container_width=True,
+                    height=500,
+                    hide_index=True
+                )
+                stage['Rows'] = len(display_explorer_df)
         else:
             st.info("📊 Data explorer will populate when community data is available")
     else:
@@ -1641,9 +3525,23 @@ def run_dashboard():
     # Approval Section - QC Checks (NOW BELOW DATA EXPLORER)
     st.markdown('<div class="section-header">Quality Control Checks</div>', unsafe_allow_html=True)
     
-    # Perform QC checks - pass main sheet and child_infoo sheet
-    child_infoo_df = sheets_dict.get('child_infoo', pd.DataFrame()) if sheets_dict else pd.DataFrame()
-    qc_results = perform_qc_checks(filtered_df, child_df=child_infoo_df)
+    # QC runs once per data version over all households; filters only slice the result
+    qc_results = pd.DataFrame(columns=QC_ISSUE_COLUMNS)
+    qc_rule_stats = None
+    if not filtered_df.empty:
+        if lga_scope is None:
+            with trace_stage(trace, 'QC results', cache='get_qc_results') as stage:
+                qc_all, qc_rule_stats = get_qc_results(sheets_dict.get('data_version'), df, child_infoo_df)
+                stage['Rows'] = len(df)
+        else:
+            with trace_stage(trace, 'QC results', cache='get_lga_qc_results') as stage:
+                qc_all, qc_rule_stats = get_lga_qc_results(sheets_dict.get('data_version'), lga_scope, sheets_dict)
+                stage['Rows'] = len(df)
+        # Child issues without a household only show in the unfiltered full-survey view
+        include_unlinked = lga_scope is None and len(filtered_df) == len(df)
+        with trace_stage(trace, 'QC slice') as stage:
+            qc_results = slice_qc_results(qc_all, filtered_df.index, include_unlinked=include_unlinked)
+            stage['Rows'] = len(qc_results)
     
     if not qc_results.empty:
         # Summary metrics
@@ -1677,7 +3575,8 @@ def run_dashboard():
             color_continuous_scale='Reds'
         )
         fig_qc.update_layout(xaxis_tickangle=-45, showlegend=False, height=400)
-        st.plotly_chart(fig_qc, use_container_width=True)
+        with trace_stage(trace, 'QC chart render'):
+            st.plotly_chart(fig_qc, use_container_width=True)
         
         st.markdown("<br>", unsafe_allow_html=True)
         
@@ -1707,33 +3606,72 @@ def run_dashboard():
             else:
                 selected_lgas_qc = []
         
-        # Filter QC results
-        filtered_qc = qc_results.copy()
-        if selected_issue_types:
-            filtered_qc = filtered_qc[filtered_qc['Issue Type'].isin(selected_issue_types)]
-        if selected_lgas_qc:
-            filtered_qc = filtered_qc[filtered_qc['LGA'].isin(selected_lgas_qc)]
-        
-        # Remove Row Index column before displaying
-        if 'Row Index' in filtered_qc.columns:
-            filtered_qc = filtered_qc.drop(columns=['Row Index'])
+        qc_search_col, qc_sort_col, qc_order_col = st.columns([2, 1, 1])
+        with qc_search_col:
+            search_query = st.text_input("Search issues", key="qc_search", on_change=reset_qc_page,
+                                         placeholder="HH ID, enumerator, community, description...")
+        with qc_sort_col:
+            sort_choice = st.selectbox("Sort by", [QC_TABLE_DEFAULT_ORDER] + QC_TABLE_COLUMNS,
+                                       key="qc_sort_column", on_change=reset_qc_page)
+        with qc_order_col:
+            sort_order = st.selectbox("Order", ["Ascending", "Descending"], key="qc_sort_order",
+                                      on_change=reset_qc_page)
+        
+        # Filter and search QC results on the server
+        with trace_stage(trace, 'QC table search') as stage:
+            filtered_qc = qc_results
+            if selected_issue_types:
+                filtered_qc = filtered_qc[filtered_qc['Issue Type'].isin(selected_issue_types)]
+            if selected_lgas_qc:
+                filtered_qc = filtered_qc[filtered_qc['LGA'].isin(selected_lgas_qc)]
+            filtered_qc = search_qc_issues(filtered_qc, search_query)
+            stage['Rows'] = len(filtered_qc)
+        
+        qc_page_col, qc_size_col, qc_range_col = st.columns([1, 1, 2])
+        with qc_size_col:
+            page_size = st.selectbox("Rows per page", QC_TABLE_PAGE_SIZES,
+                                     index=QC_TABLE_PAGE_SIZES.index(QC_TABLE_DEFAULT_PAGE_SIZE),
+                                     key="qc_page_size", on_change=reset_qc_page)
+        page_count = qc_page_count(len(filtered_qc), page_size)
+        # Filters can leave fewer pages than the one being viewed
+        if st.session_state.get('qc_page', 1) > page_count:
+            st.session_state['qc_page'] = page_count
+        with qc_page_col:
+            page = st.number_input(f"Page (of {page_count:,})", min_value=1, max_value=page_count, step=1,
+                                   key="qc_page")
+        
+        # Only this page of rows is sent to the browser
+        with trace_stage(trace, 'QC table page') as stage:
+            page_qc = qc_table_page(filtered_qc, int(page), page_size,
+                                    sort_column=None if sort_choice == QC_TABLE_DEFAULT_ORDER else sort_choice,
+                                    descending=sort_order == "Descending")
+            stage['Rows'] = len(page_qc)
+        with qc_range_col:
+            if page_qc.empty:
+                st.caption("No issues match the search and filters")
+            else:
+                first_row = (int(page) - 1) * page_size
+                st.caption(f"Showing {first_row + 1:,}–{first_row + len(page_qc):,} of {len(filtered_qc):,} issues")
         
-        # Display filtered QC table
-        st.dataframe(
-            filtered_qc,
-            use_container_width=True,
-            height=500,
-            column_config={
-                "LGA": st.column_config.TextColumn("LGA", width="small"),
-                "Ward": st.column_config.TextColumn("Ward", width="small"),
-                "Community": st.column_config.TextColumn("Community", width="medium"),
-                "Unique HH ID": st.column_config.TextColumn("Unique HH ID", width="medium"),
-                "Enumerator": st.column_config.TextColumn("Enumerator", width="medium"),
-                "Validation Status": st.column_config.TextColumn("Validation Status", width="small"),
-                "Issue Type": st.column_config.TextColumn("Issue Type", width="medium"),
-                "Description": st.column_config.TextColumn("Description", width="large")
-            }
-        )
+        # Display the page of the QC table
+        with trace_stage(trace, 'QC table render') as stage:
+            st.dataframe(
+                page_qc,
+                use_container_width=True,
+                hide_index=True,
+                height=500,
+                column_config={
+                    "LGA": st.column_config.TextColumn("LGA", width="small"),
+                    "Ward": st.column_config.TextColumn("Ward", width="small"),
+                    "Community": st.column_config.TextColumn("Community", width="medium"),
+                    "Unique HH ID": st.column_config.TextColumn("Unique HH ID", width="medium"),
+                    "Enumerator": st.column_config.TextColumn("Enumerator", width="medium"),
+                    "Validation Status": st.column_config.TextColumn("Validation Status", width="small"),
+                    "Issue Type": st.column_config.TextColumn("Issue Type", width="medium"),
+                    "Description": st.column_config.TextColumn("Description", width="large")
+                }
+            )
+            stage['Rows'] = len(page_qc)
         
         # QC recommendations
         st.markdown("### 💡 QC Recommendations")
@@ -1754,21 +3692,11 @@ def run_dashboard():
             
             if not filtered_df.empty:
                 # Check what columns exist
-                settlement_col = find_column(filtered_df, ['Q5. Type of Settlement', 'Q5', 'settlement_type', 'settlement'])
-                lga_col = find_column(filtered_df, ['lgas', 'lga', 'Q2. Local Government Area', 'LGA'])
-                age_col = find_column(filtered_df, [
-                    'Q17. How old is ${name_questionnaire}?', 
-                    'Q17', 
-                    'age', 
-                    'respondent_age',
-                    'Age of child ${child_id} as at when MDA was done (6th to 11th December 2025)',
-                    'Age of child ${child_id} as at when MDA was done (24th to 29th July 2025)',
-                    'Age of child ${child_id} as at when MDA was done (19th to 25th July 2025)',
-                    'child_age',
-                    'Age',
-                    'age_years'
-                ])
-                enumerator_col = find_column(filtered_df, ['username', 'Type in your Name', 'Enumerator', 'enumerator_name'])
+                schema = schema_of(filtered_df)
+                settlement_col = schema['settlement']
+                lga_col = schema['lga']
+                age_col = schema['respondent_age']
+                enumerator_col = schema['qc_enumerator']
                 
                 st.write(f"- Settlement column found: {settlement_col if settlement_col else '❌ Not found'}")
                 st.write(f"- LGA column found: {lga_col if lga_col else '❌ Not found'}")
@@ -1807,10 +3735,18 @@ def run_dashboard():
         </div>
     </div>
     """, unsafe_allow_html=True)
+    
+    finish_trace(trace)
+    if trace_panel is not None:
+        with trace_panel:
+            render_trace_panel(trace, sheets_dict, qc_rule_stats)
 
 
 # ---------------- MAIN ENTRY POINT ----------------
 def main():
+    configure_page()
+    apply_custom_css()
+    
     if 'logged_in' not in st.session_state:
         st.session_state['logged_in'] = False
     
@@ -0,0 +1,169 @@
+# =============================================================================
+# SARMAAN II COVERAGE EVALUATION - HEADLESS BATCH QC
+# =============================================================================
+# Runs the dashboard's preprocessing, metrics, coverage table and QC checks over
+# a local Kobo export without a browser session, e.g. nightly from cron:
+#
+#   python qc_batch.py export.xlsx --output-dir qc_out
+#   python qc_batch.py main.csv --sheet child_infoo=children.csv --format csv
+#
+# XLSX exports are read like the dashboard reads the Kobo download (first sheet
+# is main, repeat groups by sheet name). A CSV or Parquet file is the main
+# sheet; repeat groups can be given with --sheet NAME=PATH. Only the columns the
+# checks read are loaded unless --all-columns is given.
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Streamlit logs "missing ScriptRunContext" warnings when used outside `streamlit run`
+os.environ.setdefault('STREAMLIT_LOGGER_LEVEL', 'error')
+import coverage
+
+
+def read_table(path, keep_column=None):
+    """One sheet from a CSV or Parquet file, only the columns passing keep_column when given"""
+    if path.lower().endswith('.parquet'):
+        columns = None
+        if keep_column is not None:
+            columns = [name for name in pq.read_schema(path).names if keep_column(name)]
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, low_memory=False, usecols=keep_column)
+
+
+def read_export(path, extra_sheets, keep_column=None):
+    """
+    Sheets dictionary (and load timings) from a local export plus NAME=PATH
+    extras. keep_column (see coverage.column_projection) limits the columns read.
+    """
+    start = time.perf_counter()
+    if path.lower().endswith(('.xlsx', '.xlsm')):
+        sheets_dict, load_timings = coverage.read_kobo_workbook(path, keep_column)
+    else:
+        sheets_dict = coverage.empty_sheets()
+        sheets_dict['main'] = read_table(path, keep_column)
+        load_timings = {'main': time.perf_counter() - start}
+    
+    for spec in extra_sheets:
+        name, _, sheet_path = spec.partition('=')
+        if name not in coverage.SHEET_NAMES or not sheet_path:
+            raise SystemExit(f"--sheet expects NAME=PATH with NAME one of {', '.join(coverage.SHEET_NAMES[1:])}")
+        sheet_start = time.perf_counter()
+        sheets_dict[name] = read_table(sheet_path, keep_column)
+        load_timings[name] = time.perf_counter() - sheet_start
+    
+    return sheets_dict, load_timings
+
+
+def write_frame(frame, output_dir, name, fmt):
+    """Write one result table as Parquet or CSV; returns the file path"""
+    path = os.path.join(output_dir, f"{name}.{fmt}")
+    if fmt == 'parquet':
+        # Mixed-type object columns are stored as text, as in the sheet store
+        pq.write_table(coverage._arrow_table(frame.reset_index(drop=True)), path)
+    else:
+        frame.to_csv(path, index=False)
+    return path
+
+
+def json_value(value):
+    """numpy scalars in metrics are not JSON serializable"""
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+def run_batch(sheets_dict, workers=1, disabled_rules=None):
+    """
+    Preprocess the sheets and compute metrics, the coverage table and QC issues.
+    Returns (results, timings) where timings holds seconds per stage.
+    """
+    timings = {}
+    
+    start = time.perf_counter()
+    sheets_dict = coverage.preprocess_data(sheets_dict)
+    timings['preprocess'] = time.perf_counter() - start
+    df = sheets_dict['main']
+    child_df = sheets_dict.get('child_infoo')
+    
+    start = time.perf_counter()
+    metrics = coverage.calculate_metrics(df)
+    timings['metrics'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    coverage_summary = coverage.build_coverage_summary(df, {})
+    timings['coverage'] = time.perf_counter() - start
+    
+    rule_stats = []
+    start = time.perf_counter()
+    qc_df = coverage.perform_qc_checks(df, child_df=child_df, disabled_rules=disabled_rules,
+                                       rule_stats=rule_stats, workers=workers)
+    timings['qc'] = time.perf_counter() - start
+    
+    results = {
+        'metrics': metrics,
+        'coverage_summary': coverage_summary,
+        'qc_issues': qc_df,
+        'qc_rule_stats': coverage.summarize_rule_stats(rule_stats),
+    }
+    return results, timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the coverage dashboard's QC checks over a local Kobo export.")
+    parser.add_argument('export', help="Kobo XLSX export, or a CSV/Parquet file of the main sheet")
+    parser.add_argument('--sheet', action='append', default=[], metavar='NAME=PATH',
+                        help="CSV/Parquet file for a repeat group sheet (child_info, child_infoo, net_repeat)")
+    parser.add_argument('--output-dir', default='qc_output', help="Directory for the result files (default: qc_output)")
+    parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet', help="Result table format")
+    parser.add_argument('--workers', type=int, default=coverage.QC_WORKERS, help="Worker processes to spread QC rules across")
+    parser.add_argument('--disable-rule', action='append', default=None, metavar='ISSUE_TYPE',
+                        help="Skip a QC rule by name (default: the QC_DISABLED_RULES secret)")
+    parser.add_argument('--all-columns', action='store_true',
+                        help="Load every column of the export, not only those the checks read")
+    args = parser.parse_args(argv)
+    
+    keep_column = None if args.all_columns else coverage.column_projection(args.disable_rule)
+    total_start = time.perf_counter()
+    sheets_dict, load_timings = read_export(args.export, args.sheet, keep_column)
+    load_seconds = time.perf_counter() - total_start
+    
+    results, timings = run_batch(sheets_dict, workers=args.workers, disabled_rules=args.disable_rule)
+    timings = {'load': load_seconds, **timings}
+    
+    start = time.perf_counter()
+    os.makedirs(args.output_dir, exist_ok=True)
+    written = []
+    for name in ['qc_issues', 'coverage_summary', 'qc_rule_stats']:
+        if results[name] is not None:
+            written.append(write_frame(results[name], args.output_dir, name, args.format))
+    timings['write'] = time.perf_counter() - start
+    timings['total'] = time.perf_counter() - total_start
+    
+    report = {
+        'export': args.export,
+        'rows': {name: len(sheet) for name, sheet in sheets_dict.items() if isinstance(sheet, pd.DataFrame)},
+        'metrics': results['metrics'],
+        'qc_issue_count': len(results['qc_issues']),
+        'timings': timings,
+        'load_timings': load_timings,
+        'dropped_columns': sheets_dict.get('dropped_columns'),
+    }
+    report_path = os.path.join(args.output_dir, 'report.json')
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2, default=json_value)
+    written.append(report_path)
+    
+    print(f"{report['qc_issue_count']:,} QC issues from {report['rows'].get('main', 0):,} households")
+    for stage, seconds in timings.items():
+        print(f"  {stage:<10} {seconds:8.2f}s")
+    for path in written:
+        print(f"  wrote {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
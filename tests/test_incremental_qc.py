@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import benchmark
+import coverage
+
+
+def qc_inputs(raw):
+    sheets_dict = coverage.preprocess_data(dict(raw))
+    return sheets_dict['main'], sheets_dict['child_infoo']
+
+
+def assert_incremental_matches_full(raw, edit):
+    """Update a full QC run of raw for edit(raw) and compare it with a full run of the edited survey"""
+    df, child_df = qc_inputs(raw)
+    previous = {
+        'qc': coverage.perform_qc_checks(df, child_df=child_df),
+        'fingerprints': coverage.household_fingerprints(df, child_df),
+    }
+    
+    df, child_df = qc_inputs(edit({name: sheet.copy() for name, sheet in raw.items()}))
+    full = coverage.perform_qc_checks(df, child_df=child_df)
+    incremental = coverage.incremental_qc_checks(previous, df, child_df,
+                                                 coverage.household_fingerprints(df, child_df))
+    
+    assert incremental is not None
+    pd.testing.assert_frame_equal(incremental[full.columns].astype(str).reset_index(drop=True),
+                                  full.astype(str).reset_index(drop=True))
+    return full
+
+
+@pytest.fixture
+def raw():
+    return benchmark.make_survey(400, seed=3)
+
+
+def new_households(raw, count, seed):
+    """count new submissions (with children) for the same communities as raw"""
+    new = benchmark.make_survey(count, seed=seed)
+    offset = int(raw['main'].index.max()) + 1
+    new['main'].index += offset
+    new['main']['_id'] += offset
+    new['child_infoo'].index += int(raw['child_infoo'].index.max()) + 1
+    return new
+
+
+def test_append(raw):
+    def edit(sheets):
+        new = new_households(sheets, 20, seed=11)
+        # Some of them reuse existing codes
+        new['main'].loc[new['main'].index[:5], 'unique_code'] = sheets['main']['unique_code'].iloc[:5].to_numpy()
+        sheets['main'] = pd.concat([sheets['main'], new['main']])
+        sheets['child_infoo'] = pd.concat([sheets['child_infoo'], new['child_infoo']])
+        return sheets
+    
+    assert_incremental_matches_full(raw, edit)
+
+
+def test_edit(raw):
+    def edit(sheets):
+        main, children = sheets['main'], sheets['child_infoo']
+        rows = main.index[10:30]
+        main.loc[rows[:5], 'Q22. How long have you been living continuously in ${community_confirm}'] = 99
+        main.loc[rows[5:10], 'unique_code'] = main['unique_code'].iloc[100:105].to_numpy()
+        main.loc[rows[10:15], 'Q5. Type of Settlement'] = 'Urban'
+        main.loc[rows[15:20], '_validation_status'] = 'Not Approved'
+        children.loc[children.index[:10], benchmark.Q94_HEADER] = 'Yes'
+        children.loc[children.index[:10], benchmark.Q88_HEADER] = 65
+        return sheets
+    
+    assert_incremental_matches_full(raw, edit)
+
+
+def test_delete(raw):
+    def edit(sheets):
+        main = sheets['main']
+        dropped = main.index[50:60]
+        sheets['child_infoo'] = sheets['child_infoo'][
+            ~sheets['child_infoo']['_submission__uuid'].isin(main.loc[dropped, '_uuid'])
+        ]
+        sheets['main'] = main.drop(dropped)
+        return sheets
+    
+    assert_incremental_matches_full(raw, edit)
+
+
+def test_missing_unique_code(raw):
+    raw['main'].loc[raw['main'].index[:2], ['unique_code', '_validation_status']] = [np.nan, 'Approved']
+    
+    def edit(sheets):
+        new = new_households(sheets, 5, seed=12)
+        new['main'].loc[new['main'].index[:1], ['unique_code', '_validation_status']] = [np.nan, 'Approved']
+        sheets['main'] = pd.concat([sheets['main'], new['main']])
+        sheets['child_infoo'] = pd.concat([sheets['child_infoo'], new['child_infoo']])
+        return sheets
+    
+    full = assert_incremental_matches_full(raw, edit)
+    missing = full[(full['Issue Type'] == coverage.DUPLICATE_ISSUE_TYPE) & full['Unique HH ID'].isna()]
+    # The new blank-code household joins the two existing ones
+    assert len(missing) == 3
@@ -0,0 +1,127 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import benchmark
+import coverage
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'kobo')
+ASSET_PATH = '/api/v2/assets/aFx7kQ2mLpR9sT4vW8yZ3b/'
+
+# Recorded responses by the request the backend makes for them, two submissions a page
+RECORDED = {
+    ASSET_PATH + '?format=json': 'asset.json',
+    ASSET_PATH + 'data/?format=json&limit=2': 'data_page_1.json',
+    ASSET_PATH + 'data/?format=json&limit=2&start=2': 'data_page_2.json',
+}
+
+
+@pytest.fixture
+def kobo_api():
+    payloads = {}
+    for path, name in RECORDED.items():
+        with open(os.path.join(FIXTURES, name), 'rb') as f:
+            payloads[path] = f.read()
+    with benchmark.serve_kobo_api(payloads) as (base_url, requested):
+        yield base_url + ASSET_PATH, requested
+
+
+def test_follows_next_until_the_last_page(kobo_api):
+    asset_url, requested = kobo_api
+    
+    sheets_dict, load_timings = coverage.load_sheets_from_kobo_api(asset_url, page_size=2)
+    
+    assert requested == list(RECORDED)
+    assert sheets_dict['main']['_id'].tolist() == [101, 102, 103]
+    assert sheets_dict['main']['_index'].tolist() == [1, 2, 3]
+    assert set(sheets_dict) == set(coverage.SHEET_NAMES)
+    assert {'download', 'flatten', 'form_definition'} <= set(load_timings)
+
+
+def test_repeat_groups_become_child_sheets(kobo_api):
+    asset_url, _ = kobo_api
+    
+    sheets_dict, _ = coverage.load_sheets_from_kobo_api(asset_url, page_size=2)
+    
+    children = sheets_dict['child_infoo']
+    assert children['_index'].tolist() == [1, 2, 3, 4]
+    assert children['_parent_index'].tolist() == [1, 1, 2, 3]
+    assert (children['_parent_table_name'] == 'main').all()
+    assert children['_submission__id'].tolist() == [101, 101, 102, 103]
+    assert children['_submission__uuid'].tolist() == sheets_dict['main']['_uuid'].iloc[[0, 0, 1, 2]].tolist()
+    assert children['_submission__validation_status'].fillna('').tolist() == ['Approved', 'Approved', '', 'On Hold']
+    nets = sheets_dict['net_repeat']
+    assert nets['_submission__id'].tolist() == [101, 103, 103]
+    assert sheets_dict['child_info'].empty
+    # Households link to their children like the XLSX export
+    linked = coverage.link_child_records(sheets_dict['main'], children)
+    assert linked['_parent_row'].tolist() == [0, 0, 1, 2]
+
+
+def test_answers_use_choice_labels(kobo_api):
+    asset_url, _ = kobo_api
+    
+    sheets_dict, _ = coverage.load_sheets_from_kobo_api(asset_url, page_size=2)
+    
+    main = sheets_dict['main']
+    assert main['Q2. Local Government Area'].tolist() == ['Ingawa', 'Kankia', 'Ingawa']
+    assert main['Q5. Type of Settlement'].tolist() == ['Urban', 'Rural', 'Urban']
+    assert main['Q19. Means of transport'].tolist()[:2] == ['Bicycle Motorcycle', 'Motorcycle']
+    # An empty _validation_status object means the submission was never reviewed
+    assert main['_validation_status'].fillna('').tolist() == ['Approved', '', 'On Hold']
+    assert sheets_dict['child_infoo']['Q94. Did child ${child_idd} swallow the AZM offered?'].tolist() == \
+        ['Yes', 'No', 'Yes', 'Yes']
+    # Free-text answers and unlabelled metadata keep their raw values
+    assert main['Q3.Ward'].tolist() == ['Agayawa', 'Fakuwa', 'Agayawa']
+    assert main['username'].tolist() == ['enum001', 'enum002', 'enum001']
+    assert '_geolocation' not in main.columns
+
+
+def test_numeric_questions_are_coerced(kobo_api):
+    asset_url, _ = kobo_api
+    
+    sheets_dict, _ = coverage.load_sheets_from_kobo_api(asset_url, page_size=2)
+    
+    main = sheets_dict['main']
+    assert pd.api.types.is_numeric_dtype(main['Q13. Age of Head of the Household'])
+    assert main['Q13. Age of Head of the Household'].tolist()[::2] == [45, 61]
+    # Unparseable answers become missing rather than failing the load
+    assert pd.isna(main['Q13. Age of Head of the Household'].iloc[1])
+    assert main['Q102. About how many minutes did the CDD spend in your household?'].tolist() == [12.5, 30, 0]
+    nets = sheets_dict['net_repeat']
+    assert nets['Q81. Net ${net_id} :How many months ago did your household get the mosquito net?'].tolist() == \
+        [6, 12, 30]
+    # Text questions stay text even when they look like numbers
+    assert main['Q200. Respondent phone number'].tolist()[0] == '08030000001'
+
+
+def test_keep_column_drops_unused_questions(kobo_api):
+    asset_url, _ = kobo_api
+    
+    everything, _ = coverage.load_sheets_from_kobo_api(asset_url, page_size=2)
+    projected, _ = coverage.load_sheets_from_kobo_api(asset_url, page_size=2, keep_column=coverage.column_projection())
+    
+    dropped = set(everything['main'].columns) - set(projected['main'].columns)
+    assert {'Q200. Respondent phone number', 'Q19. Means of transport', '__version__', 'instanceID'} <= dropped
+    assert {'Q2. Local Government Area', 'Q3.Ward', 'Q4. Community Name', 'username', 'unique_code',
+            '_id', '_uuid', '_submission_time', '_validation_status', '_index'} <= set(projected['main'].columns)
+    # Repeat groups are still flattened, and keep their link columns
+    pd.testing.assert_frame_equal(projected['child_infoo'], everything['child_infoo'])
+    pd.testing.assert_frame_equal(projected['net_repeat'], everything['net_repeat'])
+
+
+def test_token_is_sent(kobo_api, monkeypatch):
+    asset_url, _ = kobo_api
+    sent = []
+    original_get = coverage.requests.Session.get
+    
+    def get(session, url, **kwargs):
+        sent.append(session.headers.get('Authorization'))
+        return original_get(session, url, **kwargs)
+    
+    monkeypatch.setattr(coverage.requests.Session, 'get', get)
+    coverage.load_sheets_from_kobo_api(asset_url, token='abc123', page_size=2)
+    
+    assert sent == ['Token abc123'] * 3
@@ -0,0 +1,118 @@
+import json
+
+import pandas as pd
+
+import coverage
+
+
+def submission(_id, time, household, children=()):
+    """One Kobo API submission with a child_info repeat group"""
+    return {
+        '_id': _id,
+        '_uuid': f'uuid-{_id}',
+        '_submission_time': time,
+        'household': household,
+        'child_info': [{'child_info/child_name': name} for name in children],
+    }
+
+
+def api_sheets(records):
+    """Flatten submissions the way load_sheets_from_kobo_api does"""
+    rows = coverage.flatten_kobo_submissions(records, {}, {'child_info'}, {})
+    return {name: pd.DataFrame.from_records(rows.get(name, [])) for name in coverage.SHEET_NAMES}
+
+
+BASE = [
+    submission(1, '2026-01-01T09:00:00', 'HH-1', ['Ada', 'Bola']),
+    submission(2, '2026-01-01T10:00:00', 'HH-2', ['Chidi']),
+]
+
+
+def test_duplicate_id_replaces_base_row():
+    base = api_sheets(BASE)
+    delta = api_sheets([submission(2, '2026-01-01T10:00:00', 'HH-2 edited'),
+                        submission(3, '2026-01-02T08:00:00', 'HH-3')])
+    
+    merged = coverage.merge_kobo_delta(base, delta)
+    
+    main = merged['main']
+    assert list(main['_id']) == [1, 2, 3]
+    assert main.loc[main['_id'] == 2, 'household'].tolist() == ['HH-2 edited']
+    assert main['_index'].is_unique
+    assert main.index.is_unique
+    # Rows that did not change keep their labels
+    assert main.loc[0, 'household'] == 'HH-1'
+
+
+def test_edited_submission_replaces_its_child_rows():
+    base = api_sheets(BASE)
+    delta = api_sheets([submission(2, '2026-01-01T10:00:00', 'HH-2', ['Chidi', 'Dayo'])])
+    
+    merged = coverage.merge_kobo_delta(base, delta)
+    
+    children = merged['child_info']
+    assert children.groupby('_submission__id')['child_name'].apply(list).to_dict() == {
+        1: ['Ada', 'Bola'],
+        2: ['Chidi', 'Dayo'],
+    }
+    assert children['_index'].is_unique
+    assert children.index.is_unique
+    # The new child rows still point at the new main row of their submission
+    main = merged['main']
+    parent_index = main.loc[main['_id'] == 2, '_index'].item()
+    assert (children.loc[children['_submission__id'] == 2, '_parent_index'] == parent_index).all()
+    assert (children.loc[children['_submission__id'] == 1, '_parent_index'] == 1).all()
+
+
+def test_empty_delta_keeps_base():
+    base = api_sheets(BASE)
+    
+    merged = coverage.merge_kobo_delta(base, api_sheets([]))
+    
+    for name in coverage.SHEET_NAMES:
+        pd.testing.assert_frame_equal(merged[name], base[name])
+
+
+def test_incremental_sync_merges_delta_and_advances_watermark(tmp_path, monkeypatch):
+    responses = [api_sheets(BASE),
+                 api_sheets([submission(2, '2026-01-01T10:00:00', 'HH-2', ['Chidi', 'Dayo']),
+                             submission(3, '2026-01-02T08:00:00', 'HH-3', ['Efe'])])]
+    calls = []
+    
+    def fake_load(asset_url, token="", params=None, keep_column=None, **kwargs):
+        calls.append(params)
+        return responses[len(calls) - 1], {}
+    
+    monkeypatch.setattr(coverage, 'load_sheets_from_kobo_api', fake_load)
+    
+    _, _, state = coverage.sync_kobo_incremental('https://kobo.example/api/v2/assets/abc/', cache_dir=str(tmp_path))
+    assert calls == [None]
+    assert state['watermark']['last_id'] == 2
+    
+    sheets_dict, _, state = coverage.sync_kobo_incremental('https://kobo.example/api/v2/assets/abc/',
+                                                           cache_dir=str(tmp_path))
+    query = json.loads(calls[1]['query'])
+    assert {'_id': {'$gt': 2}} in query['$or']
+    assert state['delta_submissions'] == 2
+    assert state['watermark']['last_id'] == 3
+    assert state['watermark']['last_submission_time'] == '2026-01-02T08:00:00'
+    assert list(sheets_dict['main']['_id']) == [1, 2, 3]
+    assert len(sheets_dict['child_info']) == 5
+    # The merged dataset is what the next run starts from
+    stored = coverage.read_synced_dataset(str(tmp_path))
+    pd.testing.assert_frame_equal(stored['child_info'], sheets_dict['child_info'])
+
+
+def test_incremental_sync_with_empty_delta_keeps_dataset(tmp_path, monkeypatch):
+    responses = [api_sheets(BASE), api_sheets([])]
+    monkeypatch.setattr(coverage, 'load_sheets_from_kobo_api',
+                        lambda *args, **kwargs: (responses.pop(0), {}))
+    
+    first, _, _ = coverage.sync_kobo_incremental('https://kobo.example/api/v2/assets/abc/', cache_dir=str(tmp_path))
+    second, _, state = coverage.sync_kobo_incremental('https://kobo.example/api/v2/assets/abc/',
+                                                      cache_dir=str(tmp_path))
+    
+    assert state['delta_submissions'] == 0
+    assert state['watermark']['last_id'] == 2
+    for name in coverage.SHEET_NAMES:
+        pd.testing.assert_frame_equal(second[name], first[name])
@@ -0,0 +1,20 @@
+import pandas as pd
+
+import benchmark
+import coverage
+
+
+def test_worker_processes_match_a_serial_run():
+    sheets_dict = coverage.preprocess_data(benchmark.make_survey(300, seed=4))
+    df, child_df = sheets_dict['main'], sheets_dict['child_infoo']
+    # Mixed numbers and text cannot go through Arrow as-is
+    df['Q13. Age of Head of the Household'] = df['Q13. Age of Head of the Household'].astype(object)
+    df.loc[df.index[:3], 'Q13. Age of Head of the Household'] = 'unknown'
+    
+    serial_stats, process_stats = [], []
+    serial = coverage.perform_qc_checks(df, child_df=child_df, rule_stats=serial_stats)
+    in_processes = coverage.perform_qc_checks(df, child_df=child_df, rule_stats=process_stats, workers=2)
+    
+    pd.testing.assert_frame_equal(in_processes, serial)
+    assert [(stats['Rule'], stats['Status'], stats['Flagged']) for stats in process_stats] == \
+        [(stats['Rule'], stats['Status'], stats['Flagged']) for stats in serial_stats]
@@ -0,0 +1,81 @@
+import gc
+import os
+from io import BytesIO
+
+import pytest
+
+import benchmark
+import coverage
+
+
+def lazy_snapshot(seed):
+    """A survey read from its XLSX export the way the dashboard does, with lazy secondary sheets"""
+    content = benchmark.write_workbook(benchmark.make_survey(30, seed=seed))
+    sheets_dict, _ = coverage.read_kobo_workbook(BytesIO(content), coverage.column_projection(), coverage.LAZY_SHEETS)
+    sheets_dict = coverage.preprocess_data(sheets_dict)
+    sheets_dict['data_version'] = coverage.compute_data_version(sheets_dict)
+    return sheets_dict
+
+
+def stored_versions(cache_dir):
+    store_dir = os.path.join(cache_dir, 'store')
+    return {entry for entry in os.listdir(store_dir) if os.path.isdir(os.path.join(store_dir, entry))}
+
+
+def test_lazy_sheets_round_trip_through_the_store(tmp_path):
+    snapshot = lazy_snapshot(seed=1)
+    expected = {name: coverage.get_sheet(lazy_snapshot(seed=1), name) for name in coverage.LAZY_SHEETS}
+    coverage.write_sheet_store(str(tmp_path), snapshot)
+    
+    stored = coverage.read_sheet_store(str(tmp_path))
+    
+    assert coverage.compute_data_version(stored) == snapshot['data_version']
+    for name in coverage.LAZY_SHEETS:
+        assert coverage.is_lazy_sheet(stored[name])
+        assert coverage.get_sheet(stored, name).equals(expected[name])
+
+
+def test_versions_read_by_a_served_snapshot_are_not_pruned(tmp_path):
+    cache_dir = str(tmp_path)
+    first = lazy_snapshot(seed=1)
+    coverage.write_sheet_store(cache_dir, first)
+    served = coverage.read_sheet_store(cache_dir)
+    
+    for seed in (2, 3):
+        coverage.write_sheet_store(cache_dir, lazy_snapshot(seed=seed))
+    
+    assert first['data_version'] in stored_versions(cache_dir)
+    assert not coverage.get_sheet(served, 'net_repeat').empty
+    
+    # Once the snapshot is gone the next write prunes its version
+    del served
+    gc.collect()
+    coverage.write_sheet_store(cache_dir, lazy_snapshot(seed=4))
+    assert first['data_version'] not in stored_versions(cache_dir)
+    assert len(stored_versions(cache_dir)) == coverage.STORE_KEEP_VERSIONS
+
+
+def test_failed_lazy_load_raises(tmp_path):
+    cache_dir = str(tmp_path)
+    snapshot = lazy_snapshot(seed=1)
+    coverage.write_sheet_store(cache_dir, snapshot)
+    served = coverage.read_sheet_store(cache_dir)
+    os.remove(os.path.join(cache_dir, 'store', snapshot['data_version'], coverage.STORE_WORKBOOK_FILE))
+    
+    with pytest.raises(OSError):
+        coverage.get_sheet(served, 'child_info')
+    assert coverage.is_lazy_sheet(served['child_info']) and served['child_info']['frame'] is None
+
+
+def test_stored_numeric_columns_are_read_only_views(tmp_path):
+    snapshot = lazy_snapshot(seed=1)
+    coverage.write_sheet_store(str(tmp_path), snapshot)
+    
+    main = coverage.read_sheet_store(str(tmp_path))['main']
+    
+    ages = main['Q13. Age of Head of the Household'].to_numpy()
+    assert not ages.flags.writeable and not ages.flags.owndata
+    # A copy is the consumer's own to change
+    copied = main.copy()
+    copied.loc[copied.index[0], 'Q13. Age of Head of the Household'] = 0
+    assert copied['Q13. Age of Head of the Household'].iloc[0] == 0